@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.admission")
+
+# Directory shared by the worker and its job processes. The worker sets it on startup
+# so that the job processes it spawns inherit it.
+STATS_DIR_ENV = "WORKER_STATS_DIR"
+
+# Stats files older than this are ignored (the job process is gone or stuck)
+STATS_STALE_SECONDS = 15.0
+
+
+@dataclass
+class AdmissionConfig:
+    """Limits used to turn worker health signals into a load score."""
+    max_concurrent_calls: int = 8
+    loop_lag_budget_ms: float = 250.0
+    queue_depth_budget: int = 500
+    memory_budget_fraction: float = 0.8
+    load_threshold: float = 0.95
+
+    @classmethod
+    def from_env(cls) -> "AdmissionConfig":
+        return cls(
+            max_concurrent_calls=int(os.getenv("MAX_CONCURRENT_CALLS", cls.max_concurrent_calls)),
+            loop_lag_budget_ms=float(os.getenv("LOOP_LAG_BUDGET_MS", cls.loop_lag_budget_ms)),
+            queue_depth_budget=int(os.getenv("QUEUE_DEPTH_BUDGET", cls.queue_depth_budget)),
+            memory_budget_fraction=float(os.getenv("MEMORY_BUDGET_FRACTION", cls.memory_budget_fraction)),
+            load_threshold=float(os.getenv("WORKER_LOAD_THRESHOLD", cls.load_threshold)),
+        )
+
+
+def get_stats_dir() -> str:
+    return os.getenv(STATS_DIR_ENV) or os.path.join(tempfile.gettempdir(), "futures_survey_worker")
+
+
+# --- Job process side -------------------------------------------------------
+
+# Callables returning the number of items waiting in a local queue (transcript buffer,
+# pending DB writes, ...). Registered by the components that own the queues.
+_queue_depth_sources: dict[str, Callable[[], int]] = {}
+
+
+def register_queue_depth(name: str, source: Callable[[], int]) -> None:
+    """Report the size of a local queue as part of this process's load."""
+    _queue_depth_sources[name] = source
+
+
+def unregister_queue_depth(name: str) -> None:
+    _queue_depth_sources.pop(name, None)
+
+
+def current_queue_depth() -> int:
+    depth = 0
+    for name, source in list(_queue_depth_sources.items()):
+        try:
+            depth += int(source())
+        except Exception as e:
+            logger.warning("Queue depth source %s failed: %s", name, e)
+    return depth
+
+
+class LoadReporter:
+    """Measures event-loop lag in a job process and publishes it with the session count,
+    queue depth and memory usage to a stats file read by the worker's AdmissionController."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.active_sessions = 0
+        self.loop_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._path = os.path.join(get_stats_dir(), f"{os.getpid()}.json")
+
+    def session_started(self) -> None:
+        self.active_sessions += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def session_ended(self) -> None:
+        self.active_sessions = max(0, self.active_sessions - 1)
+        self._write()
+        if self.active_sessions == 0 and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            # Smooth the lag so a single slow callback doesn't flip admission on and off
+            self.loop_lag_ms = 0.7 * self.loop_lag_ms + 0.3 * lag_ms
+            self._write()
+
+    def _write(self) -> None:
+        import psutil
+
+        stats = {
+            "pid": os.getpid(),
+            "sessions": self.active_sessions,
+            "loop_lag_ms": round(self.loop_lag_ms, 2),
+            "queue_depth": current_queue_depth(),
+            "rss_bytes": psutil.Process().memory_info().rss,
+            "updated_at": time.time(),
+        }
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning("Could not write load stats: %s", e)
+
+
+_reporter: Optional[LoadReporter] = None
+
+
+def get_load_reporter() -> LoadReporter:
+    """Return the load reporter of the current job process."""
+    global _reporter
+    if _reporter is None:
+        _reporter = LoadReporter()
+    return _reporter
+
+
+# --- Worker side ------------------------------------------------------------
+
+@dataclass
+class LoadSnapshot:
+    active_sessions: int = 0
+    loop_lag_ms: float = 0.0
+    queue_depth: int = 0
+    rss_bytes: int = 0
+    scores: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def load(self) -> float:
+        return min(1.0, max(self.scores.values(), default=0.0))
+
+
+class AdmissionController:
+    """Computes the worker load reported to the LiveKit dispatcher.
+
+    The load is the highest of four ratios, each reaching 1.0 at its configured limit:
+    active sessions vs. max concurrent calls, worst event-loop lag vs. its budget,
+    outstanding queue depth vs. its budget, and projected memory (current usage plus
+    one more average session) vs. the memory budget. Once the load reaches
+    `load_threshold` the worker is marked full and new calls go to other workers.
+    """
+
+    def __init__(self, config: Optional[AdmissionConfig] = None):
+        self.config = config or AdmissionConfig.from_env()
+        self.last_snapshot = LoadSnapshot()
+        os.environ.setdefault(STATS_DIR_ENV, os.path.join(get_stats_dir(), str(os.getpid())))
+        # A drain marker left by an earlier run would end every new session right away
+        from drain import clear_drain_state
+        clear_drain_state()
+
+    def _read_job_stats(self) -> list[dict]:
+        stats_dir = get_stats_dir()
+        try:
+            names = os.listdir(stats_dir)
+        except FileNotFoundError:
+            return []
+        now = time.time()
+        stats = []
+        for name in names:
+            # Only the per-process {pid}.json files; the directory also holds other shared state
+            if not (name.endswith(".json") and name[:-5].isdigit()):
+                continue
+            path = os.path.join(stats_dir, name)
+            try:
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - entry.get("updated_at", 0) > STATS_STALE_SECONDS:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            stats.append(entry)
+        return stats
+
+    def snapshot(self, worker=None) -> LoadSnapshot:
+        import psutil
+
+        job_stats = self._read_job_stats()
+        active_jobs = len(worker.active_jobs) if worker is not None else 0
+        snap = LoadSnapshot(
+            active_sessions=max(active_jobs, sum(s.get("sessions", 0) for s in job_stats)),
+            loop_lag_ms=max((s.get("loop_lag_ms", 0.0) for s in job_stats), default=0.0),
+            queue_depth=sum(s.get("queue_depth", 0) for s in job_stats),
+            rss_bytes=psutil.Process().memory_info().rss + sum(s.get("rss_bytes", 0) for s in job_stats),
+        )
+
+        memory_budget = psutil.virtual_memory().total * self.config.memory_budget_fraction
+        per_session = snap.rss_bytes / snap.active_sessions if snap.active_sessions else 0
+        snap.scores = {
+            "sessions": snap.active_sessions / max(1, self.config.max_concurrent_calls),
+            "loop_lag": snap.loop_lag_ms / self.config.loop_lag_budget_ms,
+            "queue_depth": snap.queue_depth / max(1, self.config.queue_depth_budget),
+            "memory": (snap.rss_bytes + per_session) / memory_budget if memory_budget else 0.0,
+        }
+        return snap
+
+    def load(self, worker=None) -> float:
+        """Load function for agents.WorkerOptions(load_fnc=...)."""
+        if worker is not None and getattr(worker, "draining", False):
+            # Shutting down: stay full and tell the job processes the drain deadline
+            from drain import start_drain
+            start_drain()
+            return 1.0
+        try:
+            snap = self.snapshot(worker)
+        except Exception as e:
+            logger.warning("Load computation failed, reporting previous load: %s", e)
+            return self.last_snapshot.load
+
+        if snap.load >= self.config.load_threshold > self.last_snapshot.load:
+            limiting = max(snap.scores, key=snap.scores.get)
+            logger.warning("Worker at capacity (load %.2f, limited by %s): %s", snap.load, limiting, snap.scores)
+        self.last_snapshot = snap
+        return snap.load
@@ -0,0 +1,101 @@
+"""Memory benchmark for per-session survey state.
+
+Creates N concurrent sessions of the same campaign and reports the bytes each
+session adds on top of the shared campaign bundle (campaign dict, questions and
+prompt). For comparison it also measures the previous layout, where every session
+held its own campaign dict copy, question tuples, prompt string and answer dict.
+
+The LiveKit session objects (STT/TTS streams, VAD, room) are not included; this
+measures the state owned by this project.
+
+Usage:
+    python bench_session_memory.py --sessions 500 --questions 12
+"""
+import argparse
+import gc
+import tracemalloc
+
+from campaigns import build_bundle, compile_prompt_template, render_prompt
+from user_data import UserData
+
+
+def make_campaign(num_questions: int):
+    campaign = {
+        "id": 1,
+        "name": "InnoVet-AMR 2024",
+        "description": "Survey on climate change, AMR, and animal health.",
+        "intro_prompt": "You are the automated survey agent for the InnoVet-AMR initiative. " * 8,
+        "purpose_explanation": "Thank you for taking part in our InnoVet-AMR survey. " * 4,
+        "greeting": "Hello, welcome to our survey.",
+        "closing": "Thank you for completing this survey. We value your input.",
+        "campaign_type": "phone_survey",
+    }
+    rows = [
+        (100 + i, f"Question {i}: how would you rate the impact of antimicrobial resistance on your work? " * 2, i)
+        for i in range(1, num_questions + 1)
+    ]
+    return campaign, rows
+
+
+def answer_all(answers, num_questions: int) -> None:
+    for i in range(1, num_questions + 1):
+        answers[str(i)] = f"answer number {i}"
+
+
+def measure(create_session, sessions: int) -> int:
+    """Return the bytes allocated per session by create_session()."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    held = [create_session() for _ in range(sessions)]
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return (after - before) // sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report bytes per concurrent survey session")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=12)
+    args = parser.parse_args()
+
+    campaign, rows = make_campaign(args.questions)
+
+    tracemalloc.start()
+    bundle = build_bundle(campaign, rows)
+    shared_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def new_session():
+        userdata = UserData(customer_phone="+15145550100", submission_id="9b2f3c1e-0000-0000-0000-000000000000")
+        userdata.attach_bundle(bundle)
+        answer_all(userdata.questionnaire_answers, args.questions)
+        return userdata
+
+    def legacy_session():
+        # Previous layout: per-session copies of everything
+        state = {
+            "customer_phone": "+15145550100",
+            "submission_id": "9b2f3c1e-0000-0000-0000-000000000000",
+            "campaign": dict(campaign),
+            "questions": [tuple(row) for row in rows],
+            "prompt": render_prompt(compile_prompt_template(campaign, bundle.questions)),
+            "conversation_log": [],
+            "questionnaire_answers": {},
+        }
+        answer_all(state["questionnaire_answers"], args.questions)
+        return state
+
+    per_session = measure(new_session, args.sessions)
+    legacy_per_session = measure(legacy_session, args.sessions)
+
+    print(f"sessions: {args.sessions}, questions: {args.questions}, prompt: {len(bundle.prompt)} chars")
+    print(f"shared campaign bundle:   {shared_bytes:>8} bytes (once per campaign)")
+    print(f"per session (slotted):    {per_session:>8} bytes")
+    print(f"per session (legacy):     {legacy_per_session:>8} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Startup-time benchmark for the agent modules.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and reports
+the total import time, the slowest imports, and any heavy dependency that got
+imported eagerly even though it should be deferred to first use.
+
+Usage:
+    python bench_startup.py                     # report for main.py
+    python bench_startup.py --budget-ms 1500    # fail if import takes longer
+    python bench_startup.py db_manager recording --top 10
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Packages that must only be imported when first used (see db_manager.get_supabase,
+# main.load_plugin and UserData.summarize). Only imports made directly by project
+# modules are flagged, since what a dependency imports for itself cannot be deferred.
+DEFERRED_PACKAGES = ("supabase", "livekit.plugins", "yaml")
+
+PROJECT_MODULES = frozenset(
+    name[:-3] for name in os.listdir(os.path.dirname(os.path.abspath(__file__))) if name.endswith(".py")
+)
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_imports(module: str) -> list[tuple[str, int, int, int]]:
+    """Return (package, self_us, cumulative_us, depth) for every import done by `import module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {module} failed: {last_line}")
+
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            imports.append((package, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+
+def direct_imports(imports: list[tuple[str, int, int, int]]) -> dict[str, str]:
+    """Map each package to the package that imported it.
+
+    -X importtime prints a module after everything it imports, so the importer of an entry
+    at depth d is the next entry at depth d - 1.
+    """
+    importers = {}
+    pending: dict[int, list[str]] = {}
+    for package, _, _, depth in imports:
+        for child in pending.pop(depth + 1, ()):
+            importers[child] = package
+        pending.setdefault(depth, []).append(package)
+    return importers
+
+
+def report(module: str, top: int, budget_ms: float = None) -> bool:
+    """Print the import report for a module. Returns False if a check failed."""
+    imports = measure_imports(module)
+    total_us = next((cumulative for package, _, cumulative, depth in imports if package == module and depth == 0), 0)
+    ok = True
+
+    print(f"== import {module}: {total_us / 1000:.1f} ms, {len(imports)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  package")
+    for package, self_us, cumulative_us, _ in sorted(imports, key=lambda i: i[2], reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {package}")
+
+    importers = direct_imports(imports)
+    eager = sorted({
+        package for package, _, _, _ in imports
+        if any(package == p or package.startswith(p + ".") for p in DEFERRED_PACKAGES)
+        and importers.get(package, module).split(".")[0] in PROJECT_MODULES
+    })
+    if eager:
+        ok = False
+        print(f"!! eagerly imported (should be deferred): {', '.join(eager)}")
+
+    if budget_ms is not None and total_us / 1000 > budget_ms:
+        ok = False
+        print(f"!! import time {total_us / 1000:.1f} ms exceeds budget of {budget_ms:.1f} ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time cost of the agent modules")
+    parser.add_argument("modules", nargs="*", default=["main"], help="modules to import (default: main)")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to show")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if a module takes longer to import")
+    args = parser.parse_args()
+
+    ok = True
+    for module in args.modules:
+        try:
+            ok = report(module, args.top, args.budget_ms) and ok
+        except RuntimeError as e:
+            print(f"!! {e}")
+            ok = False
+        print()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Versioned, read-only snapshot of campaign data shared by all job processes of a worker.
+
+The worker process periodically loads the active room mappings, their campaigns,
+questions and compiled prompt templates from Supabase and writes them to a single
+file, swapped in atomically with os.replace(). Job processes memory-map that file:
+the pages are shared through the OS page cache, so hundreds of job processes hold
+one copy of the data, and a session resolves its campaign without a DB round trip.
+Only the entry of the campaign a session needs is decoded.
+
+File layout:
+    8 bytes   magic (b"FSSNAP01")
+    8 bytes   version (unsigned, big endian)
+    4 bytes   index length N (unsigned, big endian)
+    N bytes   JSON index: {"mappings": [...], "default_campaign_id": ..., "entries": {id: [offset, length]}}
+    ...       JSON entries: {"campaign": {...}, "questions": [[id, text, order], ...], "prompt_template": "..."}
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.snapshot")
+
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("CAMPAIGN_SNAPSHOT_REFRESH_INTERVAL", "30"))
+
+MAGIC = b"FSSNAP01"
+HEADER = struct.Struct(">8sQI")
+
+# Readers check whether a newer snapshot was swapped in at most this often
+ATTACH_CHECK_SECONDS = 1.0
+
+
+def snapshot_path() -> str:
+    from admission import get_stats_dir
+    return os.path.join(get_stats_dir(), "campaign-snapshot.bin")
+
+
+def write_snapshot(path: str, version: int, mappings: list, entries: dict, default_campaign_id=None) -> None:
+    """Serialize a snapshot and atomically replace the file at path."""
+    blobs = {str(campaign_id): json.dumps(entry, default=str).encode("utf-8") for campaign_id, entry in entries.items()}
+
+    # Offsets are relative to the start of the data region, so the index can be sized first
+    offsets, position = {}, 0
+    for campaign_id, blob in blobs.items():
+        offsets[campaign_id] = [position, len(blob)]
+        position += len(blob)
+    index = json.dumps({
+        "mappings": mappings,
+        "default_campaign_id": default_campaign_id,
+        "entries": offsets,
+    }, default=str).encode("utf-8")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, version, len(index)))
+        f.write(index)
+        for blob in blobs.values():
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class CampaignSnapshot:
+    """Read side of the snapshot, attached lazily and re-attached when the file is swapped."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or snapshot_path()
+        self.version: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._file_id = None
+        self._index: dict = {}
+        self._data_start = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _attach(self) -> bool:
+        """Map the current snapshot file if it changed. Returns False if none is available."""
+        now = time.monotonic()
+        if self._mmap is not None and now - self._checked_at < ATTACH_CHECK_SECONDS:
+            return True
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self._mmap is not None
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if file_id == self._file_id:
+            return True
+
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_length = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError("not a campaign snapshot")
+            index = json.loads(mapped[HEADER.size:HEADER.size + index_length])
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Could not attach campaign snapshot %s: %s", self.path, e)
+            return self._mmap is not None
+
+        old = self._mmap
+        self._mmap, self._file_id, self.version = mapped, file_id, version
+        self._index, self._data_start = index, HEADER.size + index_length
+        if old is not None:
+            old.close()
+        logger.debug("Attached campaign snapshot version %s", version)
+        return True
+
+    def entry(self, campaign_id) -> Optional[dict]:
+        """Return {"campaign", "questions", "prompt_template"} for a campaign, or None."""
+        with self._lock:
+            if not self._attach():
+                return None
+            location = self._index.get("entries", {}).get(str(campaign_id))
+            if location is None:
+                return None
+            offset, length = location
+            start = self._data_start + offset
+            return json.loads(self._mmap[start:start + length])
+
+    def campaign_id_for_room(self, room_name: str):
+        """Match the room against the snapshot's mappings, falling back to the default campaign."""
+        from db_manager import match_room_mapping
+
+        with self._lock:
+            if not self._attach():
+                return None
+            campaign_id = match_room_mapping(self._index.get("mappings", []), room_name)
+            return campaign_id if campaign_id is not None else self._index.get("default_campaign_id")
+
+
+_snapshot: Optional[CampaignSnapshot] = None
+
+
+def get_snapshot() -> CampaignSnapshot:
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = CampaignSnapshot()
+    return _snapshot
+
+
+# --- Worker side ------------------------------------------------------------
+
+def build_snapshot_data():
+    """Load everything a session needs to start from Supabase (blocking)."""
+    from campaigns import Question, compile_prompt_template
+    from db_manager import get_active_room_mappings, get_campaign_from_db, get_campaigns_by_ids, get_questions_for_campaigns
+
+    mappings = get_active_room_mappings()
+    default_campaign = get_campaign_from_db()
+    campaign_ids = {mapping["campaign_id"] for mapping in mappings} | {default_campaign["id"]}
+
+    campaigns = get_campaigns_by_ids(sorted(campaign_ids))
+    questions = get_questions_for_campaigns(sorted(campaign_ids))
+    entries = {}
+    for campaign_id, campaign in campaigns.items():
+        rows = questions.get(campaign_id, [])
+        entries[campaign_id] = {
+            "campaign": campaign,
+            "questions": rows,
+            "prompt_template": compile_prompt_template(campaign, tuple(Question(*row) for row in rows)),
+        }
+    return mappings, entries, default_campaign["id"]
+
+
+class SnapshotRefresher:
+    """Background thread in the worker process that rebuilds the snapshot periodically."""
+
+    def __init__(self, interval: float = SNAPSHOT_REFRESH_INTERVAL, path: Optional[str] = None):
+        self.interval = interval
+        self.path = path or snapshot_path()
+        self.version = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="campaign-snapshot-refresher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def refresh(self) -> bool:
+        try:
+            mappings, entries, default_campaign_id = build_snapshot_data()
+        except Exception as e:
+            # Keep serving the previous snapshot
+            logger.error("Campaign snapshot refresh failed: %s", e)
+            return False
+        self.version = max(self.version + 1, int(time.time()))
+        write_snapshot(self.path, self.version, mappings, entries, default_campaign_id)
+        logger.info("Campaign snapshot version %s written (%s campaigns)", self.version, len(entries))
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
@@ -0,0 +1,333 @@
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from logging_config import LOGGER_NAME, get_logger
+from question_types import FREE_TEXT, TypedAnswer, describe_expected
+
+logger = get_logger(f"{LOGGER_NAME}.campaigns")
+
+# How long a campaign bundle is shared before it is reloaded (picks up campaign edits
+# and refreshes the date/time rendered into the prompt)
+CAMPAIGN_CACHE_TTL = float(os.getenv("CAMPAIGN_CACHE_TTL", "60"))
+
+# Placeholder replaced with the current date and time when a prompt is rendered
+PROMPT_TIME_MARKER = "<<CURRENT_TIME>>"
+
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    id: int
+    text: str
+    order: int
+    type: str = FREE_TEXT
+    options: Optional[Mapping] = None
+
+
+def compile_prompt_template(campaign: Mapping, questions: tuple[Question, ...]) -> str:
+    """Build the agent instructions for a campaign, with a placeholder for the current time."""
+    questions_section = ""
+    for question in questions:
+        questions_section += f"\n{question.order}) Question {question.order}:\n   \"{question.text}\"\n"
+        expected = describe_expected(question.type, question.options)
+        if expected:
+            questions_section += f"   Expected answer: {expected}\n"
+    return f"""
+{campaign['intro_prompt']}
+Current date and time: {PROMPT_TIME_MARKER}
+
+LANGUAGE POLICY
+Detect the participant's first reply.
+Do not switch languages once the conversation has started, even if the participant does.
+Never use special characters such as %, $, #, or *.
+
+SURVEY FLOW (ask only one question at a time)
+
+1) Briefly explain purpose:
+   \"{campaign['purpose_explanation']}\"
+{questions_section}
+{len(questions) + 3}) Completion check:
+   After the recap, call check_survey_complete to ensure all questions were answered.
+
+{len(questions) + 4}) Closing:
+   Survey will automatically end when check_survey_complete confirms all questions are answered.
+
+GENERAL GUIDELINES
+Ask only one question at a time.
+Respond in clear, complete sentences.
+If the participant provides unexpected information, politely steer them back to the current question.
+Do not provide medical or technical advice; clarify that your role is limited to conducting this survey.
+If the participant asks for information outside your scope, respond succinctly that you can only administer the survey.
+"""
+
+
+def render_prompt(template: str) -> str:
+    current_time = datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')
+    return template.replace(PROMPT_TIME_MARKER, current_time)
+
+
+@dataclass(frozen=True, slots=True)
+class CampaignBundle:
+    """Read-only campaign data shared by every session of the same campaign."""
+    campaign: Mapping
+    questions: tuple[Question, ...]
+    prompt: str
+    # question_order (as the string the LLM passes, e.g. "3") -> index into questions
+    index_by_number: Mapping[str, int]
+    loaded_at: float
+
+    def question_for(self, question_number: str) -> Optional[Question]:
+        index = self.index_by_number.get(str(question_number).strip())
+        return self.questions[index] if index is not None else None
+
+    def new_answer_sheet(self) -> "AnswerSheet":
+        return AnswerSheet(self.index_by_number)
+
+
+def _question_from_row(row) -> Optional[Question]:
+    qid, qtext, qorder, *typed = row
+    if not isinstance(qtext, str) or not qtext.strip():
+        # A question without text cannot be asked; keep the rest of the campaign usable
+        logger.warning("Skipping question %s (order %s): no question text", qid, qorder)
+        return None
+    qtype, qoptions = (list(typed) + [None, None])[:2]
+    return Question(qid, sys.intern(qtext), qorder, qtype or FREE_TEXT,
+                    MappingProxyType(dict(qoptions)) if qoptions else None)
+
+
+def build_bundle(campaign: Mapping, question_rows, prompt_template: Optional[str] = None) -> CampaignBundle:
+    """Create a bundle from a campaign dict and (id, question_text, question_order[, question_type,
+    question_options]) rows.
+
+    prompt_template is compiled from the campaign and questions unless given (e.g. from the snapshot).
+    """
+    questions = tuple(q for q in map(_question_from_row, question_rows) if q is not None)
+    frozen_campaign = MappingProxyType({
+        key: sys.intern(value) if isinstance(value, str) else value
+        for key, value in campaign.items()
+    })
+    return CampaignBundle(
+        campaign=frozen_campaign,
+        questions=questions,
+        prompt=render_prompt(prompt_template or compile_prompt_template(frozen_campaign, questions)),
+        index_by_number=MappingProxyType({str(q.order): i for i, q in enumerate(questions)}),
+        loaded_at=time.monotonic(),
+    )
+
+
+_bundles: dict[int, CampaignBundle] = {}
+_bundles_lock = threading.Lock()
+
+
+def _fresh_bundle(campaign_id) -> Optional[CampaignBundle]:
+    with _bundles_lock:
+        bundle = _bundles.get(campaign_id)
+    if bundle is not None and time.monotonic() - bundle.loaded_at < CAMPAIGN_CACHE_TTL:
+        return bundle
+    return None
+
+
+def get_campaign_bundle(campaign: Mapping) -> CampaignBundle:
+    """Return the shared bundle for a campaign, loading its questions on first use or after the TTL."""
+    from db_manager import get_questions_for_campaign
+
+    campaign_id = campaign["id"]
+    bundle = _fresh_bundle(campaign_id)
+    if bundle is not None:
+        return bundle
+
+    question_rows = get_questions_for_campaign(campaign_id)
+    _remember(questions={str(campaign_id): question_rows})
+    bundle = build_bundle(campaign, question_rows)
+    with _bundles_lock:
+        _bundles[campaign_id] = bundle
+    logger.info("Loaded campaign bundle %s with %s questions", campaign_id, len(bundle.questions))
+    return bundle
+
+
+def cached_bundle(campaign: Mapping) -> Optional[CampaignBundle]:
+    """Return the last known bundle for a campaign (possibly stale) without any DB call."""
+    with _bundles_lock:
+        bundle = _bundles.get(campaign["id"])
+    if bundle is not None:
+        return bundle
+    question_rows = _last_known().get("questions", {}).get(str(campaign["id"]))
+    return build_bundle(campaign, question_rows) if question_rows else None
+
+
+# --- Worker snapshot ------------------------------------------------------------
+# The worker process keeps a memory-mapped snapshot of all active campaigns (see
+# campaign_snapshot.py); sessions resolve their campaign from it without a DB call and
+# only fall back to Supabase when the snapshot is missing or does not know the campaign.
+
+def snapshot_campaign(campaign_id) -> Optional[dict]:
+    from campaign_snapshot import get_snapshot
+
+    entry = get_snapshot().entry(campaign_id)
+    return entry["campaign"] if entry else None
+
+
+def snapshot_campaign_for_room(room_name: str) -> Optional[dict]:
+    from campaign_snapshot import get_snapshot
+
+    campaign_id = get_snapshot().campaign_id_for_room(room_name)
+    return snapshot_campaign(campaign_id) if campaign_id is not None else None
+
+
+def snapshot_bundle(campaign: Mapping) -> Optional[CampaignBundle]:
+    """Return the bundle for a campaign built from the snapshot's questions and compiled prompt."""
+    from campaign_snapshot import get_snapshot
+
+    campaign_id = campaign["id"]
+    bundle = _fresh_bundle(campaign_id)
+    if bundle is not None:
+        return bundle
+    entry = get_snapshot().entry(campaign_id)
+    if entry is None:
+        return None
+    bundle = build_bundle(entry["campaign"], entry["questions"], entry["prompt_template"])
+    with _bundles_lock:
+        _bundles[campaign_id] = bundle
+    return bundle
+
+
+# --- Last known campaign data ---------------------------------------------------
+# Job processes are short-lived, so the fallback used when Supabase is unavailable is
+# kept in a small file shared by all job processes of the worker.
+
+def _last_known_path() -> str:
+    from admission import get_stats_dir
+    return os.path.join(get_stats_dir(), "campaigns-last-known.json")
+
+
+def _last_known() -> dict:
+    try:
+        with open(_last_known_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember(mappings=None, campaigns=None, questions=None) -> None:
+    data = _last_known()
+    if mappings is not None:
+        data["mappings"] = mappings
+    for key, values in (("campaigns", campaigns), ("questions", questions)):
+        if values:
+            data.setdefault(key, {}).update(values)
+    path = _last_known_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not save last known campaign data: %s", e)
+
+
+def lookup_campaign_for_room(room_name: str) -> dict:
+    """Resolve the campaign for a room from Supabase (blocking) and remember the result."""
+    from db_manager import get_active_room_mappings, get_campaign_by_id, get_campaign_from_db, match_room_mapping
+
+    mappings = get_active_room_mappings()
+    campaign_id = match_room_mapping(mappings, room_name)
+    if campaign_id is not None:
+        campaign = get_campaign_by_id(campaign_id)
+    else:
+        logger.warning("No campaign mapping found for room: %s, using fallback", room_name)
+        campaign = get_campaign_from_db()
+    _remember(mappings=mappings, campaigns={str(campaign["id"]): campaign})
+    return campaign
+
+
+def lookup_campaign_by_id(campaign_id) -> dict:
+    """Load a campaign from Supabase (blocking) and remember it."""
+    from db_manager import get_campaign_by_id
+
+    campaign = get_campaign_by_id(campaign_id)
+    _remember(campaigns={str(campaign_id): campaign})
+    return campaign
+
+
+def cached_campaign(campaign_id) -> Optional[dict]:
+    return _last_known().get("campaigns", {}).get(str(campaign_id))
+
+
+def cached_campaign_for_room(room_name: str) -> Optional[dict]:
+    """Resolve the campaign for a room from the last known mappings, without any DB call."""
+    from db_manager import match_room_mapping
+
+    data = _last_known()
+    campaign_id = match_room_mapping(data.get("mappings", []), room_name)
+    if campaign_id is None:
+        return None
+    return data.get("campaigns", {}).get(str(campaign_id))
+
+
+class AnswerSheet:
+    """Answers for one session, stored in a list indexed like the campaign's questions.
+
+    Behaves like the previous {question_number: answer} dict for the operations the
+    agent uses (item assignment, len, membership, items()). Assigning a TypedAnswer
+    stores its normalized text and keeps the structured value for typed().
+    """
+
+    __slots__ = ("_index_by_number", "_values", "_typed", "_count")
+
+    def __init__(self, index_by_number: Mapping[str, int]):
+        self._index_by_number = index_by_number
+        self._values: list[Optional[str]] = [None] * len(index_by_number)
+        self._typed: Optional[list[Optional[TypedAnswer]]] = None
+        self._count = 0
+
+    def __setitem__(self, question_number: str, answer) -> None:
+        index = self._index_by_number.get(str(question_number).strip())
+        if index is None:
+            raise KeyError(question_number)
+        if self._values[index] is None:
+            self._count += 1
+        if isinstance(answer, TypedAnswer):
+            if self._typed is None:
+                self._typed = [None] * len(self._values)
+            self._typed[index], answer = answer, answer.text
+        elif self._typed is not None:
+            self._typed[index] = None
+        self._values[index] = answer
+
+    def typed(self, question_number: str) -> Optional[TypedAnswer]:
+        index = self._index_by_number.get(str(question_number).strip())
+        if index is None or self._typed is None:
+            return None
+        return self._typed[index]
+
+    def __getitem__(self, question_number: str) -> str:
+        index = self._index_by_number.get(str(question_number).strip())
+        if index is None or self._values[index] is None:
+            raise KeyError(question_number)
+        return self._values[index]
+
+    def __contains__(self, question_number) -> bool:
+        index = self._index_by_number.get(str(question_number).strip())
+        return index is not None and self._values[index] is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self):
+        for number, index in self._index_by_number.items():
+            value = self._values[index]
+            if value is not None:
+                yield number, value
+
+    def to_dict(self) -> dict[str, str]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
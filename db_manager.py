@@ -1,22 +1,46 @@
 import os
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 import json
-from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 from dotenv import load_dotenv
 
+from logging_config import LOGGER_NAME, get_logger, setup_logging
+
 # Load environment variables
 load_dotenv()
 
+logger = get_logger(f"{LOGGER_NAME}.db")
+
+if TYPE_CHECKING:
+    from supabase import Client
+
 # Supabase configuration from environment variables
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables or .env file")
+# Supabase client, created on first use so importing this module stays cheap
+_supabase: Optional["Client"] = None
+_supabase_lock = threading.Lock()
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def get_supabase() -> "Client":
+    """Return the shared Supabase client, creating it on first call."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables or .env file")
+                from supabase import create_client
+                _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+def __getattr__(name):
+    # Keep `from db_manager import supabase` working without creating the client at import time
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 QUESTIONS_PATH = "survey_questions.json"
 
@@ -24,8 +48,8 @@ def init_db():
     """Initialize database tables in Supabase. This should be run once to create the tables."""
     # Note: In Supabase, tables are typically created through the dashboard or migrations
     # This function is kept for compatibility but tables should be created manually in Supabase
-    print("Database tables should be created in Supabase dashboard")
-    print("Required tables: campaign, question, survey_submissions, answer, campaign_room_mapping")
+    logger.info("Database tables should be created in Supabase dashboard")
+    logger.info("Required tables: campaign, question, survey_submissions, answer, campaign_room_mapping")
     
     # You can also create tables programmatically if needed:
     # This would require additional setup and permissions
@@ -49,39 +73,44 @@ def create_campaign(name, description=None, start_date=None, end_date=None,
         # Remove None values
         data = {k: v for k, v in data.items() if v is not None}
         
-        result = supabase.table("campaign").insert(data).execute()
+        result = get_supabase().table("campaign").insert(data).execute()
         
         if result.data:
             campaign_id = result.data[0]["id"]
-            print(f"Created campaign with id: {campaign_id}")
+            logger.info("Created campaign with id: %s", campaign_id)
             return campaign_id
         else:
             raise Exception("Failed to create campaign")
             
     except Exception as e:
-        print(f"Error creating campaign: {e}")
+        logger.error("Error creating campaign: %s", e)
         raise
 
-def add_question(campaign_id, question_text, question_order):
-    """Add a question to a campaign in Supabase."""
+def add_question(campaign_id, question_text, question_order, question_type=None, question_options=None):
+    """Add a question to a campaign in Supabase. question_type/question_options: see question_types.py."""
     try:
         data = {
             "campaign_id": campaign_id,
             "question_text": question_text,
-            "question_order": question_order
+            "question_order": question_order,
+            "question_type": question_type,
+            "question_options": question_options
         }
         
-        result = supabase.table("question").insert(data).execute()
+        # Remove None values
+        data = {k: v for k, v in data.items() if v is not None}
+        
+        result = get_supabase().table("question").insert(data).execute()
         
         if result.data:
             question_id = result.data[0]["id"]
-            print(f"Added question {question_order} with id: {question_id}")
+            logger.info("Added question %s with id: %s", question_order, question_id)
             return question_id
         else:
             raise Exception("Failed to add question")
             
     except Exception as e:
-        print(f"Error adding question: {e}")
+        logger.error("Error adding question: %s", e)
         raise
 
 def create_campaign_room_mapping(campaign_id, room_pattern, is_active=True):
@@ -93,23 +122,23 @@ def create_campaign_room_mapping(campaign_id, room_pattern, is_active=True):
             "is_active": is_active
         }
         
-        result = supabase.table("campaign_room_mapping").insert(data).execute()
+        result = get_supabase().table("campaign_room_mapping").insert(data).execute()
         
         if result.data:
             mapping_id = result.data[0]["id"]
-            print(f"Created campaign room mapping with id: {mapping_id}")
+            logger.info("Created campaign room mapping with id: %s", mapping_id)
             return mapping_id
         else:
             raise Exception("Failed to create campaign room mapping")
             
     except Exception as e:
-        print(f"Error creating campaign room mapping: {e}")
+        logger.error("Error creating campaign room mapping: %s", e)
         raise
 
 def get_existing_survey_submission(room_name):
     """Check if a survey submission already exists for a given room name."""
     try:
-        result = supabase.table("survey_submissions").select("*").eq("room_name", room_name).execute()
+        result = get_supabase().table("survey_submissions").select("*").eq("room_name", room_name).execute()
         
         if result.data:
             return result.data[0]  # Return the first (should be only) matching submission
@@ -117,62 +146,79 @@ def get_existing_survey_submission(room_name):
             return None
             
     except Exception as e:
-        print(f"Error checking existing survey submission: {e}")
-        return None
+        logger.error("Error checking existing survey submission: %s", e)
+        raise
 
 # Keep backward compatibility
 def get_existing_survey_response(room_name):
     """Check if a survey response already exists for a given room name (legacy wrapper)."""
     return get_existing_survey_submission(room_name)
 
+def get_active_room_mappings():
+    """Get all active campaign room mappings from Supabase."""
+    try:
+        result = get_supabase().table("campaign_room_mapping").select("*").eq("is_active", True).execute()
+        return result.data or []
+    except Exception as e:
+        logger.error("Error getting campaign room mappings: %s", e)
+        raise
+
+def match_room_mapping(mappings, room_name):
+    """Return the campaign_id of the first mapping whose pattern prefixes the room name, or None."""
+    for mapping in mappings:
+        if room_name.startswith(mapping["room_pattern"]):
+            return mapping["campaign_id"]
+    return None
+
 def get_campaign_by_room_name(room_name):
-    """Get campaign for a specific room name by matching against room patterns."""
+    """Get campaign for a specific room name by matching against room patterns.
+
+    Falls back to the most recent campaign when no pattern matches. Errors are raised
+    rather than retried with more requests, so callers can fail fast.
+    """
     try:
-        # Get all active campaign room mappings
-        result = supabase.table("campaign_room_mapping").select("*").eq("is_active", True).execute()
-        
-        if not result.data:
-            # Fallback to most recent campaign if no mappings found
-            return get_campaign_from_db()
-        
-        # Find the first matching pattern
-        for mapping in result.data:
-            pattern = mapping["room_pattern"]
-            if room_name.startswith(pattern):
-                campaign_id = mapping["campaign_id"]
-                return get_campaign_by_id(campaign_id)
+        campaign_id = match_room_mapping(get_active_room_mappings(), room_name)
+        if campaign_id is not None:
+            return get_campaign_by_id(campaign_id)
         
         # If no pattern matches, fallback to most recent campaign
-        print(f"No campaign mapping found for room: {room_name}, using fallback")
+        logger.warning("No campaign mapping found for room: %s, using fallback", room_name)
         return get_campaign_from_db()
             
     except Exception as e:
-        print(f"Error getting campaign by room name: {e}")
-        # Fallback to most recent campaign
-        return get_campaign_from_db()
+        logger.error("Error getting campaign by room name: %s", e)
+        raise
+
+def campaign_from_row(campaign):
+    """The campaign fields used by the agent, from a campaign table row."""
+    return {
+        "id": campaign["id"],
+        "name": campaign["name"],
+        "description": campaign["description"],
+        "intro_prompt": campaign["intro_prompt"],
+        "purpose_explanation": campaign["purpose_explanation"],
+        "greeting": campaign["greeting"],
+        "closing": campaign["closing"],
+        "campaign_type": campaign.get("campaign_type"),
+        # Session limits in seconds; None falls back to the worker defaults (see session_limits.py)
+        "silence_timeout_seconds": campaign.get("silence_timeout_seconds"),
+        "no_progress_timeout_seconds": campaign.get("no_progress_timeout_seconds"),
+        "max_call_duration_seconds": campaign.get("max_call_duration_seconds"),
+    }
 
 def get_campaign_by_id(campaign_id):
     """Get a specific campaign by ID from Supabase."""
     try:
-        result = supabase.table("campaign").select("*").eq("id", campaign_id).execute()
+        result = get_supabase().table("campaign").select("*").eq("id", campaign_id).execute()
         
         if result.data:
             campaign = result.data[0]
-            return {
-                "id": campaign["id"],
-                "name": campaign["name"],
-                "description": campaign["description"],
-                "intro_prompt": campaign["intro_prompt"],
-                "purpose_explanation": campaign["purpose_explanation"],
-                "greeting": campaign["greeting"],
-                "closing": campaign["closing"],
-                "campaign_type": campaign.get("campaign_type"),
-            }
+            return campaign_from_row(campaign)
         else:
             raise Exception(f"No campaign found with id: {campaign_id}")
             
     except Exception as e:
-        print(f"Error getting campaign by id: {e}")
+        logger.error("Error getting campaign by id: %s", e)
         raise
 
 def record_survey_submission(phone_number=None, campaign_id=None, room_name=None, 
@@ -184,7 +230,7 @@ def record_survey_submission(phone_number=None, campaign_id=None, room_name=None
         # First check if a survey submission already exists for this room
         existing_submission = get_existing_survey_submission(room_name)
         if existing_submission:
-            print(f"Survey submission already exists for room {room_name} with id: {existing_submission['id']}")
+            logger.info("Survey submission already exists for room %s with id: %s", room_name, existing_submission['id'])
             return existing_submission['id']
         
         data = {
@@ -206,17 +252,17 @@ def record_survey_submission(phone_number=None, campaign_id=None, room_name=None
         # Remove None values
         data = {k: v for k, v in data.items() if v is not None}
         
-        result = supabase.table("survey_submissions").insert(data).execute()
+        result = get_supabase().table("survey_submissions").insert(data).execute()
         
         if result.data:
             submission_id = result.data[0]["id"]
-            print(f"Recorded survey submission with id: {submission_id}")
+            logger.info("Recorded survey submission with id: %s", submission_id)
             return submission_id
         else:
             raise Exception("Failed to record survey submission")
             
     except Exception as e:
-        print(f"Error recording survey submission: {e}")
+        logger.error("Error recording survey submission: %s", e)
         raise
 
 def record_survey_response(phone_number, campaign_id, room_name, call_timestamp=None, s3_recording_url=None):
@@ -240,23 +286,33 @@ def record_call(phone_number, campaign_id, room_name, call_timestamp=None, s3_re
         s3_recording_url=s3_recording_url
     )
 
-def record_answer(survey_submission_id, question_id, answer_text, answered_at=None):
-    """Record an answer in Supabase using survey_submission_id."""
+def record_answer(survey_submission_id, question_id, answer_text, answered_at=None,
+                  answer_numeric=None, answer_boolean=None, answer_choice=None):
+    """Record an answer in Supabase using survey_submission_id.
+
+    answer_numeric/answer_boolean/answer_choice hold the validated value of typed questions.
+    """
+    typed_values = {
+        "answer_numeric": answer_numeric,
+        "answer_boolean": answer_boolean,
+        "answer_choice": answer_choice,
+    }
+    typed_values = {k: v for k, v in typed_values.items() if v is not None}
     try:
         # First, check if an answer already exists for this survey submission and question
-        existing_result = supabase.table("answer").select("id").eq("survey_submission_id", survey_submission_id).eq("question_id", question_id).execute()
+        existing_result = get_supabase().table("answer").select("id").eq("survey_submission_id", survey_submission_id).eq("question_id", question_id).execute()
         
         if existing_result.data:
             # Answer already exists, update it instead of inserting
             answer_id = existing_result.data[0]["id"]
-            update_data = {"answer_text": answer_text}
+            update_data = {"answer_text": answer_text, **typed_values}
             if answered_at:
                 update_data["answered_at"] = answered_at
             
-            result = supabase.table("answer").update(update_data).eq("id", answer_id).execute()
+            result = get_supabase().table("answer").update(update_data).eq("id", answer_id).execute()
             
             if result.data:
-                print(f"Updated existing answer with id: {answer_id}")
+                logger.info("Updated existing answer with id: %s", answer_id)
                 return answer_id
             else:
                 raise Exception("Failed to update existing answer")
@@ -265,80 +321,220 @@ def record_answer(survey_submission_id, question_id, answer_text, answered_at=No
             data = {
                 "survey_submission_id": survey_submission_id,
                 "question_id": question_id,
-                "answer_text": answer_text
+                "answer_text": answer_text,
+                **typed_values
             }
             
             # Add timestamp if provided, otherwise Supabase will use default
             if answered_at:
                 data["answered_at"] = answered_at
             
-            result = supabase.table("answer").insert(data).execute()
+            result = get_supabase().table("answer").insert(data).execute()
             
             if result.data:
                 answer_id = result.data[0]["id"]
-                print(f"Recorded new answer with id: {answer_id}")
+                logger.info("Recorded new answer with id: %s", answer_id)
                 return answer_id
             else:
                 raise Exception("Failed to record answer")
             
     except Exception as e:
-        print(f"Error recording answer: {e}")
+        logger.error("Error recording answer: %s", e)
+        raise
+
+def record_transcript_turns(turns):
+    """Insert a batch of transcript turns (dicts with survey_submission_id, turn_index, speaker, text, spoken_at)."""
+    if not turns:
+        return 0
+    try:
+        result = get_supabase().table("transcript_turn").insert(turns).execute()
+        return len(result.data or [])
+    except Exception as e:
+        logger.error("Error recording transcript turns: %s", e)
         raise
 
 def get_campaign_from_db():
     """Get the most recent campaign from Supabase."""
     try:
-        result = supabase.table("campaign").select("*").order("id", desc=True).limit(1).execute()
+        result = get_supabase().table("campaign").select("*").order("id", desc=True).limit(1).execute()
         
         if result.data:
             campaign = result.data[0]
-            return {
-                "id": campaign["id"],
-                "name": campaign["name"],
-                "description": campaign["description"],
-                "intro_prompt": campaign["intro_prompt"],
-                "purpose_explanation": campaign["purpose_explanation"],
-                "greeting": campaign["greeting"],
-                "closing": campaign["closing"],
-                "campaign_type": campaign.get("campaign_type"),
-            }
+            return campaign_from_row(campaign)
         else:
             raise Exception("No campaign found in database.")
             
     except Exception as e:
-        print(f"Error getting campaign: {e}")
+        logger.error("Error getting campaign: %s", e)
         raise
 
 def get_questions_for_campaign(campaign_id):
     """Get all questions for a campaign from Supabase."""
     try:
-        result = supabase.table("question").select("*").eq("campaign_id", campaign_id).order("question_order").execute()
+        result = get_supabase().table("question").select("*").eq("campaign_id", campaign_id).order("question_order").execute()
         
         if result.data:
-            return [(q["id"], q["question_text"], q["question_order"]) for q in result.data]
+            return [(q["id"], q["question_text"], q["question_order"], q.get("question_type"), q.get("question_options"))
+                    for q in result.data]
         else:
             return []
             
     except Exception as e:
-        print(f"Error getting questions: {e}")
-        return []
+        logger.error("Error getting questions: %s", e)
+        raise
+
+def get_campaigns_by_ids(campaign_ids):
+    """Get several campaigns in one query, as {campaign_id: campaign}."""
+    try:
+        result = get_supabase().table("campaign").select("*").in_("id", list(campaign_ids)).execute()
+
+        return {
+            campaign["id"]: campaign_from_row(campaign)
+            for campaign in result.data or []
+        }
+
+    except Exception as e:
+        logger.error("Error getting campaigns: %s", e)
+        raise
+
+def get_questions_for_campaigns(campaign_ids):
+    """Get the questions of several campaigns in one query, as {campaign_id: [(id, text, order, type, options), ...]}."""
+    try:
+        result = get_supabase().table("question").select("*").in_("campaign_id", list(campaign_ids)).order("question_order").execute()
+
+        questions = {}
+        for q in result.data or []:
+            questions.setdefault(q["campaign_id"], []).append(
+                (q["id"], q["question_text"], q["question_order"], q.get("question_type"), q.get("question_options")))
+        return questions
+
+    except Exception as e:
+        logger.error("Error getting questions: %s", e)
+        raise
+
+def add_call_list_entries(campaign_id, entries):
+    """Add numbers to a campaign's outbound call list. entries are dicts with phone_number (full_name, email optional)."""
+    try:
+        rows = [{"campaign_id": campaign_id, **entry} for entry in entries]
+        result = get_supabase().table("call_list_entry").insert(rows).execute()
+        logger.info("Added %s call list entries to campaign %s", len(result.data or []), campaign_id)
+        return [row["id"] for row in result.data or []]
+    except Exception as e:
+        logger.error("Error adding call list entries: %s", e)
+        raise
+
+def get_due_call_list_entries(campaign_id, limit):
+    """Get call list entries that are waiting to be dialed and whose next attempt is due."""
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        result = (get_supabase().table("call_list_entry").select("*")
+                  .eq("campaign_id", campaign_id)
+                  .in_("status", ["pending", "retry"])
+                  .lte("next_attempt_at", now)
+                  .order("next_attempt_at")
+                  .limit(limit)
+                  .execute())
+        return result.data or []
+    except Exception as e:
+        logger.error("Error getting due call list entries: %s", e)
+        raise
+
+def count_open_call_list_entries(campaign_id):
+    """Count call list entries not yet answered or given up on."""
+    try:
+        result = (get_supabase().table("call_list_entry").select("id", count="exact")
+                  .eq("campaign_id", campaign_id)
+                  .in_("status", ["pending", "retry", "dialing"])
+                  .execute())
+        return result.count or 0
+    except Exception as e:
+        logger.error("Error counting call list entries: %s", e)
+        raise
+
+def claim_call_list_entry(entry_id, status, attempts):
+    """Mark an entry as dialing, but only if it is still in the given status and attempt
+    count (nobody else claimed it since it was read). Returns True if this caller claimed it."""
+    try:
+        result = (get_supabase().table("call_list_entry")
+                  .update({"status": "dialing", "last_attempt_at": datetime.now(timezone.utc).isoformat()})
+                  .eq("id", entry_id)
+                  .eq("status", status)
+                  .eq("attempts", attempts)
+                  .execute())
+        return bool(result.data)
+    except Exception as e:
+        logger.error("Error claiming call list entry %s: %s", entry_id, e)
+        raise
+
+def reset_stale_call_list_entries(campaign_id, dialing_before):
+    """Put entries left in 'dialing' since before dialing_before (a dialer that crashed or was
+    stopped mid-call) back into the retry queue. Returns the number of entries reset."""
+    try:
+        result = (get_supabase().table("call_list_entry")
+                  .update({"status": "retry", "next_attempt_at": datetime.now(timezone.utc).isoformat()})
+                  .eq("campaign_id", campaign_id)
+                  .eq("status", "dialing")
+                  .lt("last_attempt_at", dialing_before.isoformat())
+                  .execute())
+        return len(result.data or [])
+    except Exception as e:
+        logger.error("Error resetting stale call list entries: %s", e)
+        raise
+
+def update_call_list_entry(entry_id, data):
+    """Update the dialing status of a call list entry."""
+    try:
+        get_supabase().table("call_list_entry").update(data).eq("id", entry_id).execute()
+    except Exception as e:
+        logger.error("Error updating call list entry %s: %s", entry_id, e)
+        raise
 
 def update_survey_submission_s3_url(submission_id, s3_recording_url):
     """Update the S3 recording URL for a survey submission."""
     try:
-        result = supabase.table("survey_submissions").update({"s3_recording_url": s3_recording_url}).eq("id", submission_id).execute()
+        result = get_supabase().table("survey_submissions").update({"s3_recording_url": s3_recording_url}).eq("id", submission_id).execute()
+        
+        if result.data:
+            logger.info("Updated survey submission %s with S3 recording URL: %s", submission_id, s3_recording_url)
+            return True
+        else:
+            logger.warning("No survey submission found with id %s", submission_id)
+            return False
+            
+    except Exception as e:
+        logger.error("Error updating survey submission S3 URL: %s", e)
+        return False
+
+def update_survey_submission_recording(submission_id, s3_recording_url, recording_duration_seconds):
+    """Store the finalized recording URL and duration for a survey submission."""
+    try:
+        data = {"s3_recording_url": s3_recording_url, "recording_duration_seconds": recording_duration_seconds}
+        data = {k: v for k, v in data.items() if v is not None}
+        result = get_supabase().table("survey_submissions").update(data).eq("id", submission_id).execute()
         
         if result.data:
-            print(f"Updated survey submission {submission_id} with S3 recording URL: {s3_recording_url}")
+            logger.info("Updated survey submission %s recording: %s (%ss)", submission_id, s3_recording_url, recording_duration_seconds)
             return True
         else:
-            print(f"No survey submission found with id {submission_id}")
+            logger.warning("No survey submission found with id %s", submission_id)
             return False
             
     except Exception as e:
-        print(f"Error updating survey submission S3 URL: {e}")
+        logger.error("Error updating survey submission recording: %s", e)
         return False
 
+def update_survey_submission_usage(submission_id, usage):
+    """Store a session's usage counters and estimated cost (see usage.py) on its survey submission."""
+    try:
+        result = get_supabase().table("survey_submissions").update(usage).eq("id", submission_id).execute()
+        if not result.data:
+            logger.warning("No survey submission found with id %s", submission_id)
+            return False
+        return True
+    except Exception as e:
+        logger.error("Error updating survey submission usage: %s", e)
+        raise
+
 def update_survey_response_s3_url(survey_response_id, s3_recording_url):
     """Update the S3 recording URL for a survey response (legacy wrapper)."""
     return update_survey_submission_s3_url(survey_response_id, s3_recording_url)
@@ -351,13 +547,13 @@ def update_call_s3_url(call_id, s3_recording_url):
 def get_existing_answers_for_survey_submission(submission_id):
     """Get existing answers for a survey submission to avoid duplicates."""
     try:
-        result = supabase.table("answer").select("question_id").eq("survey_submission_id", submission_id).execute()
+        result = get_supabase().table("answer").select("question_id").eq("survey_submission_id", submission_id).execute()
         if result.data:
             return [answer["question_id"] for answer in result.data]
         else:
             return []
     except Exception as e:
-        print(f"Error getting existing answers: {e}")
+        logger.error("Error getting existing answers: %s", e)
         return []
 
 def get_existing_answers_for_survey_response(survey_response_id):
@@ -373,10 +569,10 @@ def cleanup_duplicate_survey_submissions():
     """Utility function to clean up duplicate survey submissions for the same room."""
     try:
         # Get all survey submissions grouped by room_name
-        result = supabase.table("survey_submissions").select("*").order("room_name").order("created_at").execute()
+        result = get_supabase().table("survey_submissions").select("*").order("room_name").order("created_at").execute()
         
         if not result.data:
-            print("No survey submissions found")
+            logger.warning("No survey submissions found")
             return
         
         room_submissions = {}
@@ -389,18 +585,18 @@ def cleanup_duplicate_survey_submissions():
         # Find and remove duplicates (keep the first one)
         for room_name, submissions in room_submissions.items():
             if len(submissions) > 1:
-                print(f"Found {len(submissions)} duplicate submissions for room: {room_name}")
+                logger.info("Found %s duplicate submissions for room: %s", len(submissions), room_name)
                 # Keep the first submission, delete the rest
                 submissions_to_delete = submissions[1:]
                 for submission in submissions_to_delete:
-                    print(f"Deleting duplicate survey submission ID: {submission['id']}")
+                    logger.info("Deleting duplicate survey submission ID: %s", submission['id'])
                     # First delete associated answers
-                    supabase.table("answer").delete().eq("survey_submission_id", submission['id']).execute()
+                    get_supabase().table("answer").delete().eq("survey_submission_id", submission['id']).execute()
                     # Then delete the survey submission
-                    supabase.table("survey_submissions").delete().eq("id", submission['id']).execute()
+                    get_supabase().table("survey_submissions").delete().eq("id", submission['id']).execute()
                     
     except Exception as e:
-        print(f"Error cleaning up duplicates: {e}")
+        logger.error("Error cleaning up duplicates: %s", e)
 
 def cleanup_duplicate_survey_responses():
     """Utility function to clean up duplicate survey responses for the same room (legacy wrapper)."""
@@ -408,6 +604,7 @@ def cleanup_duplicate_survey_responses():
 
 # Example usage
 if __name__ == "__main__":
+    setup_logging()
     init_db()
     # Create a campaign
     campaign_id = create_campaign(
@@ -0,0 +1,570 @@
+"""Outbound call dialer for phone survey campaigns.
+
+Reads the call list of a campaign (a CSV file or the call_list_entry table), creates one
+room per call using the inbound naming convention (call-_{phone}_{suffix}, so the agent
+resolves the phone number and recording folder exactly as for inbound calls) and dials
+the number into it through the LiveKit SIP outbound trunk. The campaign id travels in the
+room metadata.
+
+Dials are paced against the configured concurrency, the session capacity of the workers
+and the observed answer rate, only inside the scheduling window, and unanswered or busy
+numbers are retried later.
+
+Usage:
+    python dialer.py --campaign-id 3 --csv calls.csv          # dial a CSV call list
+    python dialer.py --campaign-id 3                           # dial the campaign's call_list_entry rows
+    python dialer.py --campaign-id 3 --csv calls.csv --fake    # simulate against FakeSipApi
+    python dialer.py --campaign-id 3 --import-csv calls.csv    # load a CSV into call_list_entry
+"""
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+from typing import Optional
+
+import metrics
+from logging_config import LOGGER_NAME, get_logger, setup_logging
+
+logger = get_logger(f"{LOGGER_NAME}.dialer")
+
+# Must match the SIP dispatch rule prefix and extract_phone_from_room_name in main.py
+OUTBOUND_ROOM_PREFIX = "call-"
+
+SIP_OUTBOUND_TRUNK_ID = os.getenv("SIP_OUTBOUND_TRUNK_ID")
+DIAL_RING_TIMEOUT = float(os.getenv("DIAL_RING_TIMEOUT", "30"))
+# An entry still marked dialing after this long has no dialer waiting on it any more
+DIALING_STALE_AFTER = DIAL_RING_TIMEOUT + 60
+DIALER_DEFAULT_COUNTRY_CODE = os.getenv("DIALER_DEFAULT_COUNTRY_CODE", "1")
+
+ANSWERED, NO_ANSWER, BUSY, FAILED, ERROR = "answered", "no_answer", "busy", "failed", "error"
+
+# SIP status codes returned when an outbound call does not connect
+SIP_BUSY_CODES = {486, 600}
+SIP_NO_ANSWER_CODES = {408, 480, 487}
+SIP_INVALID_NUMBER_CODES = {404, 410, 484, 604}
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def normalize_phone(raw: str) -> str:
+    """Return the number in E.164 form (+digits), adding the default country code if missing."""
+    digits = re.sub(r"[^\d+]", "", raw or "")
+    if not digits.startswith("+"):
+        digits = f"+{DIALER_DEFAULT_COUNTRY_CODE}{digits.lstrip('0')}" if len(digits) == 10 else f"+{digits}"
+    if not re.fullmatch(r"\+\d{8,15}", digits):
+        raise ValueError(f"Invalid phone number: {raw!r}")
+    return digits
+
+
+def outbound_room_name(phone_number: str) -> str:
+    return f"{OUTBOUND_ROOM_PREFIX}_{phone_number}_{int(time.time() * 1000)}"
+
+
+def parse_dial_metadata(metadata: Optional[str]) -> dict:
+    """Return the dialer's room metadata ({"campaign_id", "call_list_entry_id"}), or {} for inbound rooms."""
+    if not metadata:
+        return {}
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) and data.get("outbound") else {}
+
+
+async def wait_for_answer(room, timeout: float) -> bool:
+    """Wait until a SIP participant in the room has picked up (agent side of outbound calls)."""
+    from livekit import rtc
+
+    answered = asyncio.Event()
+
+    def check(*_):
+        for participant in room.remote_participants.values():
+            if (participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
+                    and participant.attributes.get("sip.callStatus") == "active"):
+                answered.set()
+
+    room.on("participant_connected", check)
+    room.on("participant_attributes_changed", check)
+    try:
+        check()
+        await asyncio.wait_for(answered.wait(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        room.off("participant_connected", check)
+        room.off("participant_attributes_changed", check)
+
+
+# --- Call lists -----------------------------------------------------------------
+
+@dataclass
+class CallTarget:
+    campaign_id: int
+    phone_number: str
+    entry_id: Optional[str] = None
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    attempts: int = 0
+    status: str = "pending"
+    next_attempt_at: float = 0.0
+
+
+class CsvCallList:
+    """Call list read from a CSV file with a phone_number column (full_name and email optional).
+
+    Progress is kept in memory only; use it for one-off runs and local testing.
+    """
+
+    def __init__(self, path: str, campaign_id: int):
+        self.targets: list[CallTarget] = []
+        with open(path, newline="") as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    phone_number = normalize_phone(row.get("phone_number") or row.get("phone", ""))
+                except ValueError as e:
+                    logger.warning("Skipping line %s of %s: %s", line, path, e)
+                    continue
+                self.targets.append(CallTarget(
+                    campaign_id=campaign_id,
+                    phone_number=phone_number,
+                    entry_id=str(line),
+                    full_name=row.get("full_name") or None,
+                    email=row.get("email") or None,
+                ))
+
+    def due(self, limit: int) -> list[CallTarget]:
+        now = time.time()
+        targets = [t for t in self.targets if t.status in ("pending", "retry") and t.next_attempt_at <= now][:limit]
+        for target in targets:
+            target.status = "dialing"
+        return targets
+
+    def record(self, target: CallTarget, outcome: str, status: str, room_name: str) -> None:
+        target.status = status
+
+    def has_pending(self) -> bool:
+        return any(t.status in ("pending", "retry", "dialing") for t in self.targets)
+
+
+class DbCallList:
+    """Call list stored in the call_list_entry table (blocking Supabase calls)."""
+
+    def __init__(self, campaign_id: int):
+        self.campaign_id = campaign_id
+        self._stale_checked_at = 0.0
+
+    def _reset_stale(self) -> None:
+        """Requeue entries stuck in 'dialing' by a dialer that stopped mid-call (checked on
+        startup and then every DIALING_STALE_AFTER seconds)."""
+        from db_manager import reset_stale_call_list_entries
+
+        now = time.time()
+        if now - self._stale_checked_at < DIALING_STALE_AFTER:
+            return
+        self._stale_checked_at = now
+        reset = reset_stale_call_list_entries(self.campaign_id, datetime.fromtimestamp(now - DIALING_STALE_AFTER).astimezone())
+        if reset:
+            logger.warning("Requeued %s call list entries left in dialing", reset)
+
+    def due(self, limit: int) -> list[CallTarget]:
+        from db_manager import claim_call_list_entry, get_due_call_list_entries, update_call_list_entry
+
+        self._reset_stale()
+        targets = []
+        for row in get_due_call_list_entries(self.campaign_id, limit):
+            try:
+                phone_number = normalize_phone(row["phone_number"])
+            except ValueError as e:
+                logger.warning("Call list entry %s: %s", row["id"], e)
+                update_call_list_entry(row["id"], {"status": "failed", "last_outcome": FAILED})
+                continue
+            # Another dialer working the same campaign may have read the same rows: only
+            # dial the entries this update actually moved to dialing
+            if not claim_call_list_entry(row["id"], row["status"], row.get("attempts") or 0):
+                continue
+            targets.append(CallTarget(
+                campaign_id=self.campaign_id,
+                phone_number=phone_number,
+                entry_id=row["id"],
+                full_name=row.get("full_name"),
+                email=row.get("email"),
+                attempts=row.get("attempts") or 0,
+            ))
+        return targets
+
+    def record(self, target: CallTarget, outcome: str, status: str, room_name: str) -> None:
+        from db_manager import update_call_list_entry
+
+        data = {
+            "status": status,
+            "attempts": target.attempts,
+            "last_outcome": outcome,
+            "last_attempt_at": datetime.now().astimezone().isoformat(),
+            "room_name": room_name,
+        }
+        if status == "retry":
+            data["next_attempt_at"] = datetime.fromtimestamp(target.next_attempt_at).astimezone().isoformat()
+        update_call_list_entry(target.entry_id, data)
+
+    def has_pending(self) -> bool:
+        from db_manager import count_open_call_list_entries
+
+        # Stale 'dialing' entries are requeued first, so they are dialed again rather than
+        # keeping the dialer waiting for a result that will never come
+        self._reset_stale()
+        return count_open_call_list_entries(self.campaign_id) > 0
+
+
+# --- Scheduling window, retries and pacing ---------------------------------------
+
+def _parse_days(value: str) -> frozenset[int]:
+    days = set()
+    for part in value.lower().split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = (DAY_NAMES.index(p.strip()) for p in part.split("-"))
+            days.update(range(start, end + 1))
+        elif part:
+            days.add(DAY_NAMES.index(part))
+    return frozenset(days)
+
+
+@dataclass
+class DialWindow:
+    """Local hours and weekdays during which calls may be placed."""
+    start: dt_time = dt_time(9, 0)
+    end: dt_time = dt_time(20, 0)
+    days: frozenset[int] = frozenset(range(5))
+    timezone: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "DialWindow":
+        return cls(
+            start=dt_time.fromisoformat(os.getenv("DIAL_WINDOW_START", "09:00")),
+            end=dt_time.fromisoformat(os.getenv("DIAL_WINDOW_END", "20:00")),
+            days=_parse_days(os.getenv("DIAL_DAYS", "mon-fri")),
+            timezone=os.getenv("DIAL_TIMEZONE") or None,
+        )
+
+    def now(self) -> datetime:
+        if self.timezone:
+            from zoneinfo import ZoneInfo
+            return datetime.now(ZoneInfo(self.timezone))
+        return datetime.now()
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now = now or self.now()
+        return now.weekday() in self.days and self.start <= now.time() < self.end
+
+    def seconds_until_open(self, now: Optional[datetime] = None) -> float:
+        now = now or self.now()
+        if self.is_open(now):
+            return 0.0
+        for offset in range(8):
+            day = now + timedelta(days=offset)
+            opens = day.replace(hour=self.start.hour, minute=self.start.minute, second=0, microsecond=0)
+            if day.weekday() in self.days and opens > now:
+                return (opens - now).total_seconds()
+        return float("inf")
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    retry_delay: float = 1800.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        return cls(
+            max_attempts=int(os.getenv("DIALER_MAX_ATTEMPTS", cls.max_attempts)),
+            retry_delay=float(os.getenv("DIALER_RETRY_DELAY", cls.retry_delay)),
+        )
+
+    def status_after(self, target: CallTarget, outcome: str) -> str:
+        """Return the entry's next status and schedule its retry if there is one."""
+        if outcome == ANSWERED:
+            return "answered"
+        if outcome == FAILED or target.attempts >= self.max_attempts:
+            return "failed"
+        # Back off linearly with each attempt
+        target.next_attempt_at = time.time() + self.retry_delay * target.attempts
+        return "retry"
+
+
+@dataclass
+class PacingConfig:
+    max_concurrent_dials: int = 10
+    # Concurrent survey sessions all workers accept together (workers x MAX_CONCURRENT_CALLS)
+    total_capacity: int = 8
+    max_dials_per_second: float = 2.0
+    initial_answer_rate: float = 0.5
+    answer_rate_alpha: float = 0.1
+    min_answer_rate: float = 0.05
+
+    @classmethod
+    def from_env(cls, total_capacity: Optional[int] = None) -> "PacingConfig":
+        """total_capacity is used when DIALER_TOTAL_CAPACITY is unset. There is no default: the
+        capacity of one worker would make the dialer under-dial a pool of workers."""
+        total_capacity = os.getenv("DIALER_TOTAL_CAPACITY", total_capacity)
+        if total_capacity is None:
+            raise ValueError("DIALER_TOTAL_CAPACITY must be set to the number of sessions all workers accept together")
+        return cls(
+            max_concurrent_dials=int(os.getenv("DIALER_MAX_CONCURRENT", cls.max_concurrent_dials)),
+            total_capacity=int(total_capacity),
+            max_dials_per_second=float(os.getenv("DIALER_MAX_DIALS_PER_SECOND", cls.max_dials_per_second)),
+            initial_answer_rate=float(os.getenv("DIALER_INITIAL_ANSWER_RATE", cls.initial_answer_rate)),
+        )
+
+
+class Pacer:
+    """Decides how many new calls to place, predicting answers from an EWMA of the answer rate.
+
+    Ringing calls are expected to turn into sessions at the answer rate, so with free session
+    capacity C the dialer places about C / answer_rate calls, within the dial concurrency.
+    """
+
+    def __init__(self, config: Optional[PacingConfig] = None):
+        self.config = config or PacingConfig.from_env()
+        self.answer_rate = self.config.initial_answer_rate
+
+    def record(self, outcome: str) -> None:
+        if outcome in (ANSWERED, NO_ANSWER, BUSY):
+            alpha = self.config.answer_rate_alpha
+            self.answer_rate = (1 - alpha) * self.answer_rate + alpha * (1.0 if outcome == ANSWERED else 0.0)
+            metrics.set_gauge("dialer_answer_rate", round(self.answer_rate, 3))
+
+    def dials_allowed(self, ringing: int, active_sessions: int, tick_seconds: float) -> int:
+        config = self.config
+        answer_rate = max(self.answer_rate, config.min_answer_rate)
+        free_sessions = config.total_capacity - active_sessions - ringing * answer_rate
+        if free_sessions < 1:
+            return 0
+        allowed = min(
+            math.floor(free_sessions / answer_rate),
+            config.max_concurrent_dials - ringing,
+            max(1, math.floor(config.max_dials_per_second * tick_seconds)),
+        )
+        return max(0, allowed)
+
+
+# --- SIP/room APIs -------------------------------------------------------------
+
+class LiveKitSipApi:
+    """Creates rooms and dials out through the LiveKit server API."""
+
+    def __init__(self, trunk_id: Optional[str] = SIP_OUTBOUND_TRUNK_ID, ring_timeout: float = DIAL_RING_TIMEOUT):
+        from recording import create_livekit_api
+
+        if not trunk_id:
+            raise ValueError("SIP_OUTBOUND_TRUNK_ID is not set")
+        self.lkapi = create_livekit_api()
+        if self.lkapi is None:
+            raise ValueError("LIVEKIT_URL, LIVEKIT_API_KEY and LIVEKIT_API_SECRET are required")
+        self.trunk_id = trunk_id
+        self.ring_timeout = ring_timeout
+
+    async def create_room(self, room_name: str, metadata: str) -> None:
+        from livekit import api
+
+        # Close the room shortly after the call ends so it stops counting against capacity
+        await self.lkapi.room.create_room(api.CreateRoomRequest(
+            name=room_name, metadata=metadata, empty_timeout=30, departure_timeout=10,
+        ))
+
+    async def dial(self, room_name: str, target: CallTarget) -> str:
+        from google.protobuf.duration_pb2 import Duration
+        from livekit import api
+
+        try:
+            await self.lkapi.sip.create_sip_participant(api.CreateSIPParticipantRequest(
+                sip_trunk_id=self.trunk_id,
+                sip_call_to=target.phone_number,
+                room_name=room_name,
+                participant_identity=f"sip_{target.phone_number}",
+                participant_name=target.full_name or target.phone_number,
+                ringing_timeout=Duration(seconds=int(self.ring_timeout)),
+                wait_until_answered=True,
+            ))
+            return ANSWERED
+        except api.TwirpError as e:
+            sip_status = int((e.metadata or {}).get("sip_status_code", 0) or 0)
+            if sip_status in SIP_BUSY_CODES:
+                return BUSY
+            if sip_status in SIP_NO_ANSWER_CODES:
+                return NO_ANSWER
+            if sip_status in SIP_INVALID_NUMBER_CODES:
+                return FAILED
+            logger.warning("Dial to %s failed: %s (SIP %s)", target.phone_number, e.message, sip_status or "n/a")
+            return ERROR
+
+    async def active_rooms(self, prefix: str) -> int:
+        from livekit import api
+
+        response = await self.lkapi.room.list_rooms(api.ListRoomsRequest())
+        # A room outlives its call by its empty timeout; only rooms with someone in them hold a session
+        return sum(1 for room in response.rooms if room.name.startswith(prefix) and room.num_participants > 0)
+
+    async def aclose(self) -> None:
+        await self.lkapi.aclose()
+
+
+class FakeSipApi:
+    """In-process stand-in for LiveKitSipApi: rings, answers at a fixed rate and holds
+    answered calls for a while, without any network. Used with --fake and for testing pacing."""
+
+    def __init__(self, answer_rate: float = 0.6, busy_rate: float = 0.1, ring_seconds=(0.5, 2.0),
+                 talk_seconds=(3.0, 8.0), seed: Optional[int] = None):
+        self.answer_rate = answer_rate
+        self.busy_rate = busy_rate
+        self.ring_seconds = ring_seconds
+        self.talk_seconds = talk_seconds
+        self.rooms: dict[str, str] = {}
+        self.dialed: list[tuple[str, str]] = []
+        self.max_active_rooms = 0
+        self._random = random.Random(seed)
+
+    async def create_room(self, room_name: str, metadata: str) -> None:
+        self.rooms[room_name] = metadata
+        self.max_active_rooms = max(self.max_active_rooms, len(self.rooms))
+
+    async def dial(self, room_name: str, target: CallTarget) -> str:
+        await asyncio.sleep(self._random.uniform(*self.ring_seconds))
+        roll = self._random.random()
+        if roll < self.answer_rate:
+            outcome = ANSWERED
+            asyncio.get_running_loop().call_later(self._random.uniform(*self.talk_seconds), self.rooms.pop, room_name, None)
+        else:
+            outcome = BUSY if roll < self.answer_rate + self.busy_rate else NO_ANSWER
+            self.rooms.pop(room_name, None)
+        self.dialed.append((target.phone_number, outcome))
+        return outcome
+
+    async def active_rooms(self, prefix: str) -> int:
+        return sum(1 for name in self.rooms if name.startswith(prefix))
+
+    async def aclose(self) -> None:
+        pass
+
+
+# --- Dialer ----------------------------------------------------------------------
+
+class Dialer:
+    """Places the calls of one call list through a SIP API (LiveKitSipApi or FakeSipApi)."""
+
+    def __init__(self, call_list, sip_api, pacer: Optional[Pacer] = None, window: Optional[DialWindow] = None,
+                 retry: Optional[RetryPolicy] = None, tick_seconds: float = 1.0):
+        self.call_list = call_list
+        self.sip_api = sip_api
+        self.pacer = pacer or Pacer()
+        self.window = window or DialWindow.from_env()
+        self.retry = retry or RetryPolicy.from_env()
+        self.tick_seconds = tick_seconds
+        self._ringing: set[asyncio.Task] = set()
+
+    async def run(self, stop_when_done: bool = True) -> None:
+        """Dial until the call list has nothing left to dial (or forever if stop_when_done is False)."""
+        while True:
+            wait = self.window.seconds_until_open()
+            if wait > 0:
+                logger.info("Outside the dialing window, next window in %.0fs", wait)
+                await asyncio.sleep(min(wait, 300))
+                continue
+
+            # Rooms of inbound calls use the same prefix and count against capacity too
+            rooms = await self.sip_api.active_rooms(OUTBOUND_ROOM_PREFIX)
+            allowed = self.pacer.dials_allowed(len(self._ringing), max(0, rooms - len(self._ringing)), self.tick_seconds)
+            targets = await asyncio.to_thread(self.call_list.due, allowed) if allowed else []
+            for target in targets:
+                task = asyncio.create_task(self._dial(target))
+                self._ringing.add(task)
+                task.add_done_callback(self._ringing.discard)
+            metrics.set_gauge("dialer_ringing", len(self._ringing))
+
+            if stop_when_done and not targets and not self._ringing:
+                if not await asyncio.to_thread(self.call_list.has_pending):
+                    break
+            await asyncio.sleep(self.tick_seconds)
+
+        logger.info("Call list done: %s", metrics.snapshot())
+
+    async def _dial(self, target: CallTarget) -> None:
+        room_name = outbound_room_name(target.phone_number)
+        target.attempts += 1
+        metadata = json.dumps({"outbound": True, "campaign_id": target.campaign_id, "call_list_entry_id": target.entry_id})
+        try:
+            await self.sip_api.create_room(room_name, metadata)
+            outcome = await self.sip_api.dial(room_name, target)
+        except Exception as e:
+            logger.error("Dial to %s failed: %s", target.phone_number, e)
+            outcome = ERROR
+
+        self.pacer.record(outcome)
+        status = self.retry.status_after(target, outcome)
+        metrics.inc("dialer_calls", outcome=outcome)
+        logger.info("Call %s to %s: %s (attempt %s, now %s)", room_name, target.phone_number, outcome, target.attempts, status)
+        try:
+            await asyncio.to_thread(self.call_list.record, target, outcome, status, room_name)
+        except Exception as e:
+            logger.error("Could not record the result of %s: %s", room_name, e)
+
+
+async def main_async(args, pacing: PacingConfig) -> None:
+    call_list = CsvCallList(args.csv, args.campaign_id) if args.csv else DbCallList(args.campaign_id)
+    if args.fake:
+        sip_api = FakeSipApi(seed=0)
+        # Simulated calls are short: dial around the clock and retry quickly
+        dialer = Dialer(call_list, sip_api, pacer=Pacer(pacing),
+                        window=DialWindow(dt_time(0, 0), dt_time.max, frozenset(range(7))),
+                        retry=RetryPolicy(retry_delay=2.0))
+    else:
+        sip_api = LiveKitSipApi()
+        dialer = Dialer(call_list, sip_api, pacer=Pacer(pacing))
+    try:
+        await dialer.run(stop_when_done=not args.forever)
+    finally:
+        await sip_api.aclose()
+    if args.fake:
+        print(f"dialed: {len(sip_api.dialed)}, max concurrent rooms: {sip_api.max_active_rooms}, "
+              f"answer rate estimate: {dialer.pacer.answer_rate:.2f}")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Dial a campaign's call list")
+    parser.add_argument("--campaign-id", type=int, required=True)
+    parser.add_argument("--csv", help="CSV call list (phone_number[, full_name, email]); default: call_list_entry table")
+    parser.add_argument("--fake", action="store_true", help="simulate calls with FakeSipApi")
+    parser.add_argument("--forever", action="store_true", help="keep polling the call list for new entries")
+    parser.add_argument("--import-csv", metavar="CSV", help="add a CSV call list to the call_list_entry table and exit")
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    if args.import_csv:
+        from db_manager import add_call_list_entries
+
+        targets = CsvCallList(args.import_csv, args.campaign_id).targets
+        add_call_list_entries(args.campaign_id, [
+            {"phone_number": t.phone_number, "full_name": t.full_name, "email": t.email} for t in targets
+        ])
+        return
+    try:
+        # The simulation has no real workers behind it, so it may fall back to the default capacity
+        pacing = PacingConfig.from_env(PacingConfig.total_capacity if args.fake else None)
+    except ValueError as e:
+        parser.error(str(e))
+    asyncio.run(main_async(args, pacing))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Graceful drain on worker shutdown.
+
+On SIGTERM (e.g. `docker stop` during a redeploy) LiveKit stops sending new jobs to the
+worker and waits up to `drain_timeout` for running jobs before killing them. The worker
+process notices the drain from its load function, reports full load and writes a marker
+with the drain deadline to the stats directory. Job processes watch the marker: sessions
+that complete before the deadline are counted as drained; those still running
+DRAIN_FINALIZE_MARGIN seconds before it are force-finalized (partial answers, transcript
+and recording metadata saved, session closed) and counted as cut.
+"""
+import json
+import os
+import time
+from collections import Counter
+from typing import Optional
+
+import metrics
+from admission import get_stats_dir
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.drain")
+
+# How long a draining worker lets sessions run, and how long before that they are force-finalized
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "600"))
+DRAIN_FINALIZE_MARGIN = float(os.getenv("DRAIN_FINALIZE_MARGIN", "30"))
+
+DRAINED, CUT = "drained", "cut"
+
+# A marker written before this process started was left by an earlier worker run
+PROCESS_STARTED_AT = time.time()
+
+# The marker is re-read from disk at most this often
+MARKER_CACHE_SECONDS = 1.0
+
+_marker: Optional[dict] = None
+_marker_read_at = 0.0
+
+
+def _marker_path() -> str:
+    return os.path.join(get_stats_dir(), "drain.marker")
+
+
+def _outcomes_path() -> str:
+    return os.path.join(get_stats_dir(), "drain-outcomes.log")
+
+
+# --- Worker side ------------------------------------------------------------
+
+def clear_drain_state() -> None:
+    """Remove the marker and outcomes log of an earlier run (the stats dir is keyed by the
+    worker pid, which repeats across container restarts)."""
+    for path in (_marker_path(), _outcomes_path()):
+        try:
+            os.remove(path)
+            logger.info("Removed %s left by an earlier run", os.path.basename(path))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", path, e)
+
+
+def start_drain(timeout: float = WORKER_DRAIN_TIMEOUT) -> None:
+    """Write the drain marker (once) so job processes know the deadline."""
+    global _marker
+    if _marker is not None:
+        return
+    now = time.time()
+    _marker = {"started_at": now, "deadline": now + timeout}
+    path = _marker_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(_marker, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.error("Could not write drain marker: %s", e)
+    logger.warning("Worker draining: no new sessions, running sessions have %.0fs to finish", timeout)
+
+
+def summarize() -> dict:
+    """Log and return how many sessions finished during the drain and how many were cut."""
+    if _marker is None:
+        return {}
+    try:
+        with open(_outcomes_path()) as f:
+            counts = Counter(line.strip() for line in f if line.strip())
+    except OSError:
+        counts = Counter()
+    summary = {DRAINED: counts[DRAINED], CUT: counts[CUT]}
+    logger.info("Drain finished after %.0fs: %s sessions drained, %s cut",
+                time.time() - _marker["started_at"], summary[DRAINED], summary[CUT])
+    return summary
+
+
+# --- Job process side -------------------------------------------------------
+
+def drain_state() -> Optional[dict]:
+    """Return the drain marker ({"started_at", "deadline"}) if the worker is draining."""
+    global _marker, _marker_read_at
+    now = time.monotonic()
+    if _marker is None and now - _marker_read_at >= MARKER_CACHE_SECONDS:
+        _marker_read_at = now
+        try:
+            with open(_marker_path()) as f:
+                marker = json.load(f)
+            if marker.get("started_at", 0.0) >= PROCESS_STARTED_AT:
+                _marker = marker
+        except (OSError, ValueError):
+            pass
+    return _marker
+
+
+def must_finalize() -> bool:
+    """True once a draining session has to be force-finalized to beat the deadline."""
+    state = drain_state()
+    return state is not None and time.time() >= state["deadline"] - DRAIN_FINALIZE_MARGIN
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the drain deadline, or None if the worker is not draining."""
+    state = drain_state()
+    return max(0.0, state["deadline"] - time.time()) if state is not None else None
+
+
+def record_outcome(outcome: str) -> None:
+    """Count a session that ended during the drain (DRAINED or CUT)."""
+    metrics.inc("drain_sessions", outcome=outcome)
+    logger.info("Session %s during worker drain", outcome)
+    try:
+        # One short line per session; appends of this size are atomic
+        with open(_outcomes_path(), "a") as f:
+            f.write(f"{outcome}\n")
+    except OSError as e:
+        logger.warning("Could not record drain outcome: %s", e)
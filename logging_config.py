@@ -0,0 +1,139 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from contextvars import ContextVar
+from typing import Any, Optional
+
+LOGGER_NAME = "futures_survey_assistant"
+
+# Structured fields attached to every record emitted while a session is active
+SESSION_FIELDS = ("room", "submission_id", "campaign_id")
+_session_context: ContextVar[dict] = ContextVar("survey_session_context", default={})
+
+# Max characters rendered for a single payload argument (see payload())
+PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "512"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(name: str = LOGGER_NAME) -> logging.Logger:
+    """Return the project logger (or a child of it) at INFO level."""
+    project_logger = logging.getLogger(LOGGER_NAME)
+    if project_logger.level == logging.NOTSET:
+        project_logger.setLevel(logging.INFO)
+    return logging.getLogger(name)
+
+
+def bind_session(**fields: Any) -> None:
+    """Attach structured fields (room, submission_id, campaign_id) to the current session context."""
+    current = dict(_session_context.get())
+    current.update({k: v for k, v in fields.items() if v is not None})
+    _session_context.set(current)
+
+
+class SessionContextFilter(logging.Filter):
+    """Copy the bound session fields onto each record so formatters can use them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _session_context.get()
+        for key in SESSION_FIELDS:
+            if not hasattr(record, key):
+                setattr(record, key, context.get(key))
+        return True
+
+
+def _parse_sample_rates(raw: str) -> dict[str, float]:
+    """Parse "payload=0.1,progress=0.5" into {"payload": 0.1, "progress": 0.5}."""
+    rates = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        category, rate = item.split("=", 1)
+        try:
+            rates[category.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class CategorySamplingFilter(logging.Filter):
+    """Drop a fraction of records per category (passed as extra={"category": ...}).
+
+    Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: Optional[dict[str, float]] = None):
+        super().__init__()
+        self.rates = rates if rates is not None else _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "payload=0.1"))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = getattr(record, "category", None)
+        if category is None:
+            return True
+        rate = self.rates.get(category, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class payload:
+    """Lazily rendered, size-capped log argument.
+
+    Use as a %-style argument so the value is only converted to a string when the
+    record is actually emitted: logger.info("Answers: %s", payload(answers)).
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = PAYLOAD_MAX_CHARS if limit is None else limit
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if len(text) > self.limit:
+            return f"{text[:self.limit]}... [{len(text) - self.limit} chars truncated]"
+        return text
+
+    __repr__ = __str__
+
+
+def setup_logging() -> None:
+    """Route all log output through a queue drained by a background thread.
+
+    The handlers already installed on the root logger (e.g. by the LiveKit CLI) are
+    moved behind a QueueListener, so emitting a record on the event loop only costs
+    a queue put. Safe to call more than once per process.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        handlers = [logging.StreamHandler()]
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SessionContextFilter())
+    queue_handler.addFilter(CategorySamplingFilter())
+
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
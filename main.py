@@ -1,79 +1,102 @@
+import asyncio
+import importlib
 import logging
 import json
-from datetime import datetime, timezone
+import os
+import sys
+from datetime import datetime
 from typing import Annotated
 
 from dotenv import load_dotenv
-from livekit import agents
+from livekit import agents, rtc
 from livekit.agents import (Agent, AgentSession,
-                            JobProcess, RoomInputOptions,
-                            RunContext, function_tool)
-from livekit.plugins import deepgram, noise_cancellation, openai, silero
+                            JobProcess, JobRequest, RoomInputOptions,
+                            RoomOutputOptions, RunContext, function_tool)
 from pydantic import Field
 import re
 
+import metrics
+from admission import AdmissionController, get_load_reporter
+from campaign_snapshot import SnapshotRefresher
+from campaigns import (CampaignBundle, cached_bundle, cached_campaign, cached_campaign_for_room,
+                       get_campaign_bundle, lookup_campaign_by_id, lookup_campaign_for_room,
+                       snapshot_bundle, snapshot_campaign, snapshot_campaign_for_room)
+from dialer import DIAL_RING_TIMEOUT, parse_dial_metadata, wait_for_answer
+from logging_config import bind_session, get_logger, payload, setup_logging
+from question_types import InvalidAnswer, validate_answer
+from drain import CUT, DRAINED, WORKER_DRAIN_TIMEOUT, drain_state, record_outcome, summarize
+from session_limits import MAX_DURATION, NO_PROGRESS, SILENCE, WORKER_DRAIN, SessionLimits, SessionWatchdog
+from transcripts import TranscriptBuffer
+from usage import SessionUsage
 from user_data import UserData
-from recording import start_s3_recording
+from recording import JOB_SHUTDOWN_TIMEOUT, RecordingManager, start_s3_recording
+from resilience import (DATA_CHANNEL_TIMEOUT, DB_CALL_TIMEOUT, EGRESS_CALL_TIMEOUT,
+                        CircuitBreaker, DeadlineBudget, guarded_call)
 
 # --- Updated imports for DB integration ---
 from db_manager import (
-    record_call, record_answer, 
-    get_campaign_from_db, get_questions_for_campaign, update_call_s3_url,
-    get_campaign_by_room_name, get_campaign_by_id, 
-    get_existing_survey_response, get_existing_survey_submission,
+    record_answer, get_existing_survey_submission,
     record_survey_submission, update_survey_submission_s3_url,
     get_existing_answers_for_survey_submission
 )
 
 load_dotenv()
 
-logger = logging.getLogger("futures_survey_assistant")
-logger.setLevel(logging.INFO)
+logger = get_logger()
 
 # Suppress hpack debug logs
 logging.getLogger("hpack.hpack").setLevel(logging.WARNING)
     
 RunContext_T = RunContext[UserData]
 
-# These functions are now imported from db_manager.py
-
-def build_dynamic_prompt_from_db(campaign):
-    """Build dynamic prompt from a specific campaign."""
-    questions = get_questions_for_campaign(campaign["id"])
-    current_time = datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')
-    questions_section = ""
-    for qid, qtext, qorder in questions:
-        questions_section += f"\n{qorder}) Question {qorder}:\n   \"{qtext}\"\n"
-    prompt = f"""
-{campaign['intro_prompt']}
-Current date and time: {current_time}
-
-LANGUAGE POLICY
-Detect the participant's first reply.
-Do not switch languages once the conversation has started, even if the participant does.
-Never use special characters such as %, $, #, or *.
-
-SURVEY FLOW (ask only one question at a time)
-
-1) Briefly explain purpose:
-   \"{campaign['purpose_explanation']}\"
-{questions_section}
-{len(questions) + 3}) Completion check:
-   After the recap, call check_survey_complete to ensure all questions were answered.
-
-{len(questions) + 4}) Closing:
-   Survey will automatically end when check_survey_complete confirms all questions are answered.
-
-GENERAL GUIDELINES
-Ask only one question at a time.
-Respond in clear, complete sentences.
-If the participant provides unexpected information, politely steer them back to the current question.
-Do not provide medical or technical advice; clarify that your role is limited to conducting this survey.
-If the participant asks for information outside your scope, respond succinctly that you can only administer the survey.
-"""
-    return prompt, campaign, questions
+# CLI commands that run the worker (as opposed to e.g. download-files)
+WORKER_COMMANDS = ("start", "dev")
+
+# Max seconds survey completion waits for the closing speech and the DB write before closing the session
+SURVEY_CLOSE_TIMEOUT = float(os.getenv("SURVEY_CLOSE_TIMEOUT", "10"))
+# Attempts at saving a completed survey before it is reported as failed
+SURVEY_SAVE_ATTEMPTS = int(os.getenv("SURVEY_SAVE_ATTEMPTS", "3"))
+
+# Plugins used by a voice session. They are imported on first use rather than at module
+# import so that tools and tests can import this module cheaply; the worker preloads them
+# on the main thread (see prewarm and __main__), as LiveKit requires for plugin registration.
+VOICE_PLUGINS = ("deepgram", "noise_cancellation", "openai", "silero")
+TEXT_PLUGINS = ("openai",)
+
+# Text sessions run the same agent over LiveKit chat (lk.chat text streams) without any audio
+# pipeline. A room is a text session if its name starts with TEXT_ROOM_PREFIX or its campaign
+# has campaign_type TEXT_CAMPAIGN_TYPE. A worker started with WORKER_MODE=text loads no audio
+# plugins and only accepts text sessions; the default "voice" worker serves both.
+TEXT_ROOM_PREFIX = "survey-text-"
+TEXT_CAMPAIGN_TYPE = "text_survey"
+WORKER_MODE = os.getenv("WORKER_MODE", "voice")
+
+def load_plugin(name: str):
+    """Return the livekit.plugins.<name> module, importing it on first use."""
+    return importlib.import_module(f"livekit.plugins.{name}")
+
+def worker_plugins():
+    return TEXT_PLUGINS if WORKER_MODE == "text" else VOICE_PLUGINS
+
+def preload_plugins(names=None):
+    """Import the given plugins (default: those of the worker mode) up front (must be called from the main thread)."""
+    for name in names or worker_plugins():
+        load_plugin(name)
 
 # --- New functions for real-time progress tracking ---
+async def publish_data(userdata: UserData, data: dict) -> None:
+    """Publish a JSON message to the frontend over the data channel.
+
+    Goes through the session's own data_channel circuit breaker, so a degraded room fails
+    fast (DependencyUnavailable) instead of stalling the conversation, without affecting
+    the other sessions of the worker.
+    """
+    if userdata.data_channel_breaker is None:
+        userdata.data_channel_breaker = CircuitBreaker("data_channel", shared=False)
+    data_payload = json.dumps(data).encode('utf-8')
+    await guarded_call("data_channel", userdata.room.local_participant.publish_data, data_payload,
+                       reliable=True, timeout=DATA_CHANNEL_TIMEOUT, breaker=userdata.data_channel_breaker)
+
 async def send_progress_update(ctx: RunContext_T, current_question: str = None, last_answer: str = None, current_question_text: str = None):
     """Send progress update to frontend via data channel"""
     userdata = ctx.userdata
@@ -92,13 +115,12 @@ async def send_progress_update(ctx: RunContext_T, current_question: str = None,
     try:
         # Use the room stored in userdata (set from JobContext)
         if hasattr(userdata, 'room') and userdata.room:
-            data_payload = json.dumps(progress_data).encode('utf-8')
-            await userdata.room.local_participant.publish_data(data_payload, reliable=True)
-            logger.info(f"Progress update sent: {progress_data}")
+            await publish_data(userdata, progress_data)
+            logger.info("Progress update sent: %s", payload(progress_data), extra={"category": "payload"})
         else:
             logger.warning("Room not available in userdata, cannot send progress update")
     except Exception as e:
-        logger.error(f"Failed to send progress update: {e}")
+        logger.error("Failed to send progress update: %s", e)
 
 async def send_transcript_update(ctx: RunContext_T, text: str, speaker: str):
     """Send transcript update to frontend via data channel"""
@@ -113,13 +135,12 @@ async def send_transcript_update(ctx: RunContext_T, text: str, speaker: str):
     try:
         # Use the room stored in userdata (set from JobContext)
         if hasattr(userdata, 'room') and userdata.room:
-            data_payload = json.dumps(transcript_data).encode('utf-8')
-            await userdata.room.local_participant.publish_data(data_payload, reliable=True)
-            logger.info(f"Transcript update sent: {speaker}: {text[:50]}...")
+            await publish_data(userdata, transcript_data)
+            logger.info("Transcript update sent: %s: %s", speaker, payload(text, 50), extra={"category": "transcript"})
         else:
             logger.warning("Room not available in userdata, cannot send transcript update")
     except Exception as e:
-        logger.error(f"Failed to send transcript update: {e}")
+        logger.error("Failed to send transcript update: %s", e)
 
 async def send_survey_status(ctx: RunContext_T, status: str, message: str = ""):
     """Send survey status updates (started, in_progress, completed, closing, error)"""
@@ -134,43 +155,85 @@ async def send_survey_status(ctx: RunContext_T, status: str, message: str = ""):
     try:
         # Use the room stored in userdata (set from JobContext)
         if hasattr(userdata, 'room') and userdata.room:
-            data_payload = json.dumps(status_data).encode('utf-8')
-            await userdata.room.local_participant.publish_data(data_payload, reliable=True)
-            logger.info(f"Survey status sent: {status} - {message}")
+            await publish_data(userdata, status_data)
+            logger.info("Survey status sent: %s - %s", status, message)
         else:
             logger.warning("Room not available in userdata, cannot send survey status")
     except Exception as e:
-        logger.error(f"Failed to send survey status: {e}")
+        logger.error("Failed to send survey status: %s", e)
 
 
 class MainAgent(Agent):
-    def __init__(self, campaign, questions) -> None:
-        MAIN_PROMPT, self.campaign, self.questions = build_dynamic_prompt_from_db(campaign)
-        logger.info(f"MainAgent initialized for campaign '{campaign['name']}' with dynamic prompt: %s", MAIN_PROMPT)
-        self.conversation_log = []  # Track conversation for transcript
+    def __init__(self, bundle: CampaignBundle) -> None:
+        # The prompt string and campaign data are shared with every session of this campaign
+        self.bundle = bundle
+        logger.info("MainAgent initialized for campaign '%s'", bundle.campaign['name'])
+        logger.debug("Dynamic prompt: %s", payload(bundle.prompt), extra={"category": "payload"})
         super().__init__(
-            instructions=MAIN_PROMPT,
+            instructions=bundle.prompt,
             tools=[set_questionnaire_answer, check_survey_complete],
-            tts=openai.TTS(voice="nova"),
         )
     
     async def on_enter(self) -> None:
-        greeting = self.campaign["greeting"] or "Hello, welcome to our survey."
+        greeting = self.bundle.campaign["greeting"] or "Hello, welcome to our survey."
         await self.session.say(greeting, allow_interruptions=False)
         
         # Note: We'll send initial progress updates after session is fully initialized
         # The session context will be available in the tools once the session starts
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    setup_logging()
+    preload_plugins()
+    if WORKER_MODE != "text":
+        proc.userdata["vad"] = load_plugin("silero").VAD.load()
+
+def is_text_session(room_name: str, campaign=None) -> bool:
+    if room_name.startswith(TEXT_ROOM_PREFIX):
+        return True
+    return bool(campaign) and campaign.get("campaign_type") == TEXT_CAMPAIGN_TYPE
+
+async def request_text_job(req: JobRequest):
+    """Job request filter of text workers: accept only rooms that are text sessions."""
+    room_name = req.room.name
+    # The campaign snapshot resolves campaign_type without a DB call in the worker process
+    campaign = None if room_name.startswith(TEXT_ROOM_PREFIX) else snapshot_campaign_for_room(room_name)
+    if is_text_session(room_name, campaign):
+        await req.accept()
+    else:
+        logger.info("Text worker rejecting voice room %s", room_name)
+        await req.reject()
 
 # --- Updated to use survey_submissions table ---
 async def save_userdata_to_db(userdata: UserData, campaign_id: int, submission_id: int):
+    """Persist answers (in a worker thread) and flush the transcript concurrently."""
+    pending = [asyncio.to_thread(persist_userdata, userdata, campaign_id, submission_id)]
+    if userdata.transcript is not None and submission_id is not None:
+        pending.append(userdata.transcript.flush())
+    await asyncio.gather(*pending)
+    if userdata.transcript is not None and submission_id is None:
+        await userdata.transcript.flush()
+    return True
+
+def persist_userdata(userdata: UserData, campaign_id: int, submission_id: int):
+    """Write the recording URL and answers of a session to the DB (blocking)."""
+    if submission_id is None:
+        # The DB was unavailable when the session started: create the submission now
+        submission_id = record_survey_submission(
+            phone_number=userdata.customer_phone,
+            email=userdata.customer_email,
+            campaign_id=campaign_id,
+            room_name=userdata.room.name,
+            s3_recording_url=userdata.s3_recording_url
+        )
+        userdata.submission_id = submission_id
+        if userdata.transcript is not None:
+            userdata.transcript.submission_id = submission_id
+    
     # Save S3 recording URL if present
-    if getattr(userdata, 's3_recording_url', None):
+    if userdata.s3_recording_url:
         update_survey_submission_s3_url(submission_id, userdata.s3_recording_url)
-        logger.info(f"Updated survey submission {submission_id} with S3 recording URL: {userdata.s3_recording_url}")
-    elif getattr(userdata, 'recording_id', None):
+        logger.info("Updated survey submission %s with S3 recording URL: %s", submission_id, userdata.s3_recording_url)
+    elif userdata.recording_id:
         # Optionally, if you have a way to build the S3 URL from recording_id, do it here
         pass
     
@@ -179,53 +242,52 @@ async def save_userdata_to_db(userdata: UserData, campaign_id: int, submission_i
     
     # Save all answers to DB
     for q_num, answer in userdata.questionnaire_answers.items():
-        # Get question ID from Supabase
-        questions = get_questions_for_campaign(campaign_id)
-        question_id = None
-        for q_id, q_text, q_order in questions:
-            if q_order == int(q_num):
-                question_id = q_id
-                break
+        question = userdata.bundle.question_for(q_num)
+        question_id = question.id if question else None
         
         if question_id:
             # Only record if this question hasn't been answered yet
             if question_id not in existing_question_ids:
-                record_answer(submission_id, question_id, answer)
-                logger.info(f"Saved answer for question {q_num} to DB.")
+                typed = userdata.questionnaire_answers.typed(q_num)
+                record_answer(submission_id, question_id, answer,
+                              answer_numeric=typed.numeric if typed else None,
+                              answer_boolean=typed.boolean if typed else None,
+                              answer_choice=typed.choice if typed else None)
+                logger.info("Saved answer for question %s to DB.", q_num)
             else:
-                logger.info(f"Answer for question {q_num} already exists, skipping.")
+                logger.info("Answer for question %s already exists, skipping.", q_num)
         else:
-            logger.warning(f"Question id not found for campaign {campaign_id}, order {q_num}")
+            logger.warning("Question id not found for campaign %s, order %s", campaign_id, q_num)
     return True
     
 @function_tool    
 async def set_questionnaire_answer(
     question_number: Annotated[str, Field(description="The question number (e.g., '1', '2', '3')")],
-    answer: Annotated[str, Field(description="The answer")], 
+    answer: Annotated[str, Field(description="The answer, in the form given by the question's expected answer if it has one")], 
     ctx: RunContext_T
 ) -> str:
     userdata = ctx.userdata
-    userdata.questionnaire_answers[question_number] = answer
-    
-    # Find current question text
-    current_question_text = None
-    for q_id, q_text, q_order in userdata.questions:
-        if q_order == int(question_number):
-            current_question_text = q_text
-            break
+    question = userdata.bundle.question_for(question_number)
+    if question is None:
+        valid_numbers = ", ".join(str(q.order) for q in userdata.questions)
+        return f"Question number {question_number} does not exist. Valid question numbers are: {valid_numbers}"
+    # Validate locally so a malformed answer costs one tool call with a precise hint, not several turns
+    try:
+        typed = validate_answer(question.type, question.options, answer)
+    except InvalidAnswer as e:
+        metrics.inc("answer_rejected", question_type=question.type)
+        logger.info("Answer for question %s rejected: %s", question_number, e)
+        return f"Answer for question {question_number} was NOT saved. {e}"
+    answer = typed.text
+    userdata.questionnaire_answers[question_number] = typed
     
     # Send transcript update for participant answer
     await send_transcript_update(ctx, answer, "participant")
     
     # Determine next question
-    next_question_num = str(int(question_number) + 1)
-    next_question_text = None
-    
-    if int(question_number) < len(userdata.questions):
-        for q_id, q_text, q_order in userdata.questions:
-            if q_order == int(next_question_num):
-                next_question_text = q_text
-                break
+    next_question_num = str(question.order + 1)
+    next_question = userdata.bundle.question_for(next_question_num)
+    next_question_text = next_question.text if next_question else None
     
     # Send progress update with current answer and next question info
     await send_progress_update(
@@ -235,8 +297,8 @@ async def set_questionnaire_answer(
         current_question_text=next_question_text
     )
     
-    logger.info(f"Question {question_number} answer set: {answer}")
-    logger.info(f"All questionnaire answers: {userdata.questionnaire_answers}")
+    logger.info("Question %s answer set: %s", question_number, payload(answer))
+    logger.debug("All questionnaire answers: %s", payload(userdata.questionnaire_answers), extra={"category": "payload"})
     
     if len(userdata.questionnaire_answers) == len(userdata.questions):
         await send_survey_status(ctx, "in_progress", "All questions answered, ready for completion")
@@ -249,25 +311,41 @@ async def check_survey_complete(ctx: RunContext_T) -> str:
     userdata = ctx.userdata
     total_questions = len(userdata.questions)
     answered_questions = len(userdata.questionnaire_answers)
-    logger.info(f"Survey completion check: {answered_questions}/{total_questions} questions answered")
+    logger.info("Survey completion check: %s/%s questions answered", answered_questions, total_questions)
     
     if answered_questions == total_questions:
-        # Save complete survey to DB
-        await save_userdata_to_db(userdata, userdata.campaign["id"], userdata.submission_id)
-        logger.info("Survey completed - all data saved to DB")
-        
-        # Send completion status
-        await send_survey_status(ctx, "completed", "Survey successfully completed and saved to database")
-        
-        # Send final progress update
-        await send_progress_update(ctx, current_question=None, last_answer=None)
+        # The session is ending on its own terms; stop enforcing idle limits
+        if userdata.watchdog:
+            await userdata.watchdog.aclose()
         
-        # Automatically end the call after completion
+        # Start the closing message right away and persist while it plays
         closing_message = userdata.campaign.get("closing", "Thank you for completing the survey. Goodbye!")
+        persist_task = asyncio.create_task(persist_completed_survey(ctx))
+        pending = {persist_task}
+        if userdata.session:
+            speech = userdata.session.say(closing_message, allow_interruptions=False)
+            pending.add(asyncio.create_task(speech.wait_for_playout()))
         
-        # Say the closing message first
-        if hasattr(userdata, 'session') and userdata.session:
-            await userdata.session.say(closing_message, allow_interruptions=False)
+        # Close only once the caller heard the closing and the DB acknowledged the write,
+        # but never keep the room open longer than SURVEY_CLOSE_TIMEOUT
+        _, not_done = await asyncio.wait(pending, timeout=SURVEY_CLOSE_TIMEOUT)
+        save_error = None
+        if persist_task in not_done:
+            logger.warning("Survey not yet saved after %ss, closing the session anyway", SURVEY_CLOSE_TIMEOUT)
+            # Keep the job process alive until the write finishes, without holding the session open
+            agents.get_job_context().add_shutdown_callback(lambda: wait_for_survey_saved(persist_task))
+        else:
+            if not_done:
+                logger.warning("Closing message still playing after %ss, closing the session", SURVEY_CLOSE_TIMEOUT)
+            save_error = persist_task.exception()
+            if save_error is not None:
+                logger.error("Failed to save the completed survey: %s", save_error)
+                metrics.inc("survey_save_failed")
+                await send_survey_status(ctx, "error", f"Survey answers could not be saved: {save_error}")
+        
+        # Stop the recording now rather than when LiveKit tears the room down
+        if userdata.recording:
+            await userdata.recording.stop("survey_completed")
         
         # Send closing status and end the call
         await send_survey_status(ctx, "closing", "Survey completed, ending call")
@@ -278,15 +356,82 @@ async def check_survey_complete(ctx: RunContext_T) -> str:
             try:
                 await userdata.session.aclose()
             except Exception as e:
-                logger.warning(f"Error closing session: {e}")
+                logger.warning("Error closing session: %s", e)
                 # Session may already be closed or closing, which is fine
         
+        if save_error is not None:
+            return f"Survey answers could NOT be saved ({save_error}). Said closing message and ended the call."
         return f"Survey complete! Said closing message and ended the call."
     else:
-        missing_questions = [str(q[2]) for q in userdata.questions if str(q[2]) not in userdata.questionnaire_answers]
+        missing_questions = [str(q.order) for q in userdata.questions if str(q.order) not in userdata.questionnaire_answers]
         await send_survey_status(ctx, "in_progress", f"Survey incomplete. Missing questions: {missing_questions}")
         return f"Survey is not complete. {answered_questions}/{total_questions} questions answered. Missing questions: {missing_questions}"
 
+LIMIT_MESSAGES = {
+    SILENCE: "Session ended: no response from the participant",
+    NO_PROGRESS: "Session ended: no new answer for too long",
+    MAX_DURATION: "Session ended: maximum call duration reached",
+    WORKER_DRAIN: "Session ended: the survey service is restarting",
+}
+
+async def end_session_early(userdata: UserData, reason: str, message: str) -> None:
+    """End an unfinished session: save the partial answers, tell the frontend why, then
+    stop the recording and close the session and the job."""
+    job_ctx = agents.get_job_context()
+    save_task = asyncio.create_task(save_userdata_to_db(userdata, userdata.campaign["id"], userdata.submission_id))
+    done, _ = await asyncio.wait({save_task}, timeout=SURVEY_CLOSE_TIMEOUT)
+    if not done:
+        logger.warning("Partial answers not yet saved after %ss, ending the session anyway", SURVEY_CLOSE_TIMEOUT)
+        job_ctx.add_shutdown_callback(lambda: asyncio.wait({save_task}))
+    elif save_task.exception():
+        logger.error("Failed to save partial answers: %s", save_task.exception())
+    
+    try:
+        await publish_data(userdata, {
+            "type": "survey_status",
+            "status": "ended",
+            "reason": reason,
+            "message": message,
+            "timestamp": datetime.now().isoformat()
+        })
+    except Exception as e:
+        logger.warning("Could not send survey status %s: %s", reason, e)
+    
+    if userdata.recording:
+        await userdata.recording.stop(reason)
+    if userdata.session:
+        try:
+            await userdata.session.aclose()
+        except Exception as e:
+            logger.warning("Error closing session: %s", e)
+    job_ctx.shutdown(reason=reason)
+
+async def persist_completed_survey(ctx: RunContext_T) -> None:
+    """Save the completed survey, retrying failed writes, then report completion to the frontend."""
+    userdata = ctx.userdata
+    for attempt in range(1, SURVEY_SAVE_ATTEMPTS + 1):
+        try:
+            # Answers already stored are skipped, so a retry only writes what is missing
+            await save_userdata_to_db(userdata, userdata.campaign["id"], userdata.submission_id)
+            break
+        except Exception as e:
+            if attempt == SURVEY_SAVE_ATTEMPTS:
+                raise
+            logger.warning("Saving the survey failed (attempt %s/%s): %s", attempt, SURVEY_SAVE_ATTEMPTS, e)
+            await asyncio.sleep(attempt)
+    logger.info("Survey completed - all data saved to DB")
+    
+    await send_survey_status(ctx, "completed", "Survey successfully completed and saved to database")
+    await send_progress_update(ctx, current_question=None, last_answer=None)
+
+async def wait_for_survey_saved(persist_task: asyncio.Task) -> None:
+    """Shutdown callback: let a survey save that outlived the session finish, and log its failure."""
+    try:
+        await persist_task
+    except Exception as e:
+        logger.error("Failed to save the completed survey: %s", e)
+        metrics.inc("survey_save_failed")
+
 @function_tool
 async def end_call(ctx: RunContext_T) -> str:
     """End the survey call after sending closing status"""
@@ -316,9 +461,20 @@ def extract_email_from_room_name(room_name: str) -> str:
         return None
     return None
     
+async def start_recording_or_raise(room_name: str, userdata: UserData) -> bool:
+    """start_s3_recording, raising on failure so the egress circuit breaker counts it."""
+    if not await start_s3_recording(room_name, userdata):
+        raise RuntimeError("egress recording did not start")
+    return True
+
 async def entrypoint(ctx: agents.JobContext):
     room = ctx.room
     room_name = room.name
+
+    # Report this session, loop lag and queue depth to the worker's admission controller
+    load_reporter = get_load_reporter()
+    load_reporter.session_started()
+    ctx.add_shutdown_callback(load_reporter.session_ended)
     
     # Extract identifier (phone or email) from room name
     phone_number = extract_phone_from_room_name(room_name)
@@ -327,94 +483,202 @@ async def entrypoint(ctx: agents.JobContext):
     # Determine participant identifier
     participant_id = phone_number if phone_number else (email if email else "unknown")
     
-    logger.info(f"Room name: {room_name}")
-    logger.info(f"Participant ID: {participant_id}")
+    # Calls placed by dialer.py carry their campaign in the room metadata
+    dial_metadata = parse_dial_metadata(ctx.job.room.metadata)
+    
+    bind_session(room=room_name)
+    logger.info("Room name: %s", room_name)
+    logger.info("Participant ID: %s", participant_id)
+    metrics.start_reporter()
+    ctx.add_shutdown_callback(metrics.log_snapshot)
+    
+    # Outbound calls: the room exists while the phone is still ringing. Wait for the answer
+    # before creating the submission or starting the egress, so unanswered, busy and
+    # retried dials leave no submission row and record nothing.
+    if dial_metadata:
+        await ctx.connect()
+        if not await wait_for_answer(ctx.room, timeout=DIAL_RING_TIMEOUT + 5):
+            logger.info("Outbound call to %s was not answered, ending session", participant_id)
+            ctx.shutdown(reason="not answered")
+            return
+    
+    # Each startup step only gets what is left of the session's budget. When a dependency is
+    # down its circuit breaker fails the step fast and the session continues degraded
+    # (last known campaign, submission created at completion, no recording).
+    budget = DeadlineBudget()
     
     # Check if survey submission already exists for this room
-    existing_submission = get_existing_survey_submission(room_name)
+    existing_submission = await guarded_call("supabase", get_existing_survey_submission, room_name,
+                                             budget=budget, timeout=DB_CALL_TIMEOUT, fallback=None)
     if existing_submission:
-        logger.info(f"Survey submission already exists for room {room_name} (ID: {existing_submission['id']})")
+        logger.info("Survey submission already exists for room %s (ID: %s)", room_name, existing_submission['id'])
         submission_id = existing_submission['id']
         campaign_id = existing_submission['campaign_id']
-        campaign = get_campaign_by_id(campaign_id)
+        campaign = snapshot_campaign(campaign_id) or await guarded_call(
+            "supabase", lookup_campaign_by_id, campaign_id, budget=budget,
+            timeout=DB_CALL_TIMEOUT, fallback=lambda: cached_campaign(campaign_id))
     else:
-        # Select campaign based on room name
-        campaign = get_campaign_by_room_name(room_name)
-        logger.info(f"Selected campaign: {campaign['name']} (ID: {campaign['id']})")
-        
-        # Create new survey submission only if one doesn't exist
-        submission_id = record_survey_submission(
-            phone_number=participant_id if phone_number else None,
-            email=participant_id if email else None,
-            campaign_id=campaign["id"], 
-            room_name=room_name, 
-            s3_recording_url=None
-        )
-        logger.info(f"New survey submission recorded in DB with id: {submission_id}")
+        dial_campaign_id = dial_metadata.get("campaign_id")
+        if dial_campaign_id is not None:
+            campaign = snapshot_campaign(dial_campaign_id) or await guarded_call(
+                "supabase", lookup_campaign_by_id, dial_campaign_id, budget=budget,
+                timeout=DB_CALL_TIMEOUT, fallback=lambda: cached_campaign(dial_campaign_id))
+        else:
+            # Select campaign based on room name
+            campaign = snapshot_campaign_for_room(room_name) or await guarded_call(
+                "supabase", lookup_campaign_for_room, room_name, budget=budget,
+                timeout=DB_CALL_TIMEOUT, fallback=lambda: cached_campaign_for_room(room_name))
+        submission_id = None
+        if campaign:
+            logger.info("Selected campaign: %s (ID: %s)", campaign['name'], campaign['id'])
+            
+            # Create new survey submission only if one doesn't exist
+            submission_id = await guarded_call(
+                "supabase", record_survey_submission,
+                phone_number=participant_id if phone_number else None,
+                email=participant_id if email else None,
+                campaign_id=campaign["id"], 
+                room_name=room_name, 
+                s3_recording_url=None,
+                budget=budget, timeout=DB_CALL_TIMEOUT, fallback=None
+            )
+            logger.info("New survey submission recorded in DB with id: %s", submission_id)
+    
+    if not campaign:
+        logger.error("No campaign available for room %s (database unavailable and nothing cached), ending session", room_name)
+        ctx.shutdown(reason="campaign unavailable")
+        return
+    bind_session(submission_id=submission_id, campaign_id=campaign["id"])
+    text_mode = is_text_session(room_name, campaign)
+    if text_mode:
+        logger.info("Text session: no audio pipeline, no recording")
+    elif WORKER_MODE == "text":
+        logger.error("Voice room %s dispatched to a text worker, ending session", room_name)
+        ctx.shutdown(reason="voice session on text worker")
+        return
     
     # Initialize user data
     userdata = UserData()
     userdata.customer_phone = phone_number if phone_number else None
     userdata.customer_email = email if email else None
     
-    # Get questions for the selected campaign
-    questions = get_questions_for_campaign(campaign["id"])
-    logger.info(f"Loaded {len(questions)} questions for campaign {campaign['id']}")
+    # Campaign, questions and prompt are shared with other sessions of the same campaign
+    bundle = snapshot_bundle(campaign) or await guarded_call(
+        "supabase", get_campaign_bundle, campaign, budget=budget,
+        timeout=DB_CALL_TIMEOUT, fallback=lambda: cached_bundle(campaign))
+    if bundle is None:
+        logger.error("No questions available for campaign %s, ending session", campaign['id'])
+        ctx.shutdown(reason="questions unavailable")
+        return
+    userdata.attach_bundle(bundle)
+    logger.info("Loaded %s questions for campaign %s", len(bundle.questions), campaign['id'])
     
     userdata.agents.update({
-        "main_agent": MainAgent(campaign, questions),
+        "main_agent": MainAgent(bundle),
     })
-    userdata.questions = userdata.agents["main_agent"].questions
-    userdata.campaign = campaign  # Store campaign dict in userdata
     userdata.submission_id = submission_id  # Set submission_id instead of call_id
     userdata.room = ctx.room  # Store room reference for data publishing
     
-    # For backward compatibility, also set call_id to submission_id
-    userdata.call_id = submission_id
+    # Stops the egress when the survey ends and records the final file; finalized on shutdown at the latest
+    userdata.recording = RecordingManager(userdata)
+    ctx.add_shutdown_callback(userdata.recording.aclose)
     
-    # Start S3 voice recording only if not already started
-    if not existing_submission or not existing_submission.get('s3_recording_url'):
-        recording_success = await start_s3_recording(room_name, userdata)
+    # Start S3 voice recording only if not already started (text sessions have no audio to record)
+    if text_mode:
+        userdata.s3_recording_url = None
+    elif not existing_submission or not existing_submission.get('s3_recording_url'):
+        recording_success = await guarded_call("egress", start_recording_or_raise, room_name, userdata,
+                                               budget=budget, timeout=EGRESS_CALL_TIMEOUT, fallback=False)
         if recording_success:
             logger.info("S3 Recording started successfully")
             # Update the survey submission with the recording URL
-            if hasattr(userdata, 's3_recording_url') and userdata.s3_recording_url:
-                update_survey_submission_s3_url(submission_id, userdata.s3_recording_url)
+            if userdata.s3_recording_url and submission_id is not None:
+                await guarded_call("supabase", update_survey_submission_s3_url, submission_id, userdata.s3_recording_url,
+                                   timeout=DB_CALL_TIMEOUT, fallback=False)
         else:
             logger.warning("S3 Recording failed, continuing without recording")
             userdata.s3_recording_url = None  # Explicitly set to None if failed
+            userdata.recording.discard_failed_start(room_name)
     else:
         logger.info("S3 Recording already exists for this survey submission")
         userdata.s3_recording_url = existing_submission.get('s3_recording_url')
     
-    await ctx.connect()
-    session = AgentSession(
-        userdata=userdata,
-        stt=deepgram.STT(model="nova-3", language="en-US"),
-        llm=openai.LLM(model="gpt-4o-mini"),
-        tts=openai.TTS(voice="nova"),
-        vad=silero.VAD.load(),
-        max_tool_steps=5,
-    )
+    if not dial_metadata:
+        await ctx.connect()
+
+    @ctx.room.on("participant_disconnected")
+    def _on_participant_disconnected(participant: rtc.RemoteParticipant):
+        # The caller left: nothing more worth recording
+        if participant.kind in (rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD, rtc.ParticipantKind.PARTICIPANT_KIND_SIP):
+            userdata.recording.stop_soon("participant_disconnected")
+
+    openai = load_plugin("openai")
+    if text_mode:
+        # Same agent and tools; user input arrives as chat messages and replies go out as text
+        session = AgentSession(
+            userdata=userdata,
+            llm=openai.LLM(model="gpt-4o-mini"),
+            max_tool_steps=5,
+        )
+        room_input_options = RoomInputOptions(text_enabled=True, audio_enabled=False)
+        room_output_options = RoomOutputOptions(audio_enabled=False, transcription_enabled=True)
+    else:
+        deepgram, silero = load_plugin("deepgram"), load_plugin("silero")
+        session = AgentSession(
+            userdata=userdata,
+            stt=deepgram.STT(model="nova-3", language="en-US"),
+            llm=openai.LLM(model="gpt-4o-mini"),
+            tts=openai.TTS(voice="nova"),
+            vad=ctx.proc.userdata.get("vad") or silero.VAD.load(),
+            max_tool_steps=5,
+        )
+        room_input_options = RoomInputOptions(
+            noise_cancellation=load_plugin("noise_cancellation").BVC(),
+        )
+        room_output_options = RoomOutputOptions()
     userdata.session = session
+
+    # Capture user/agent turns and persist them in batches; flushed one last time on shutdown
+    userdata.transcript = TranscriptBuffer(submission_id)
+    userdata.transcript.attach(session)
+    ctx.add_shutdown_callback(userdata.transcript.aclose)
+
+    # End abandoned or runaway sessions (campaign limits, worker defaults otherwise)
+    userdata.watchdog = SessionWatchdog(
+        userdata, SessionLimits.for_campaign(userdata.campaign),
+        on_limit=lambda reason: end_session_early(userdata, reason, LIMIT_MESSAGES[reason]),
+    )
+    userdata.watchdog.attach(session)
+    ctx.add_shutdown_callback(userdata.watchdog.aclose)
+
+    async def _report_drain_outcome(*_):
+        # Sessions ending while the worker drains: finished in time, or force-finalized by the watchdog
+        if drain_state() is not None:
+            record_outcome(CUT if userdata.watchdog.limit_hit == WORKER_DRAIN else DRAINED)
+    ctx.add_shutdown_callback(_report_drain_outcome)
+
+    # Token, audio and tool usage of this session, stored with a cost estimate on the submission
+    userdata.usage = SessionUsage(userdata)
+    userdata.usage.attach(session)
+    ctx.add_shutdown_callback(userdata.usage.save)
+
     await session.start(
         agent=userdata.agents["main_agent"],
         room=ctx.room,
-        room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
-        ),
+        room_input_options=room_input_options,
+        room_output_options=room_output_options,
     )
     
     # Send the first question to the frontend after session starts
     # Send directly using userdata.room without creating a RunContext
     if userdata.questions:
-        first_question = userdata.questions[0]  # (q_id, q_text, q_order)
+        first_question = userdata.questions[0]
         
         # Send progress update with first question
         progress_data = {
             "type": "survey_progress",
             "current_question_number": "1",
-            "current_question_text": first_question[1],  # q_text
+            "current_question_text": first_question.text,
             "total_questions": len(userdata.questions),
             "answered_questions": 0,
             "last_answer": None,
@@ -433,21 +697,41 @@ async def entrypoint(ctx: agents.JobContext):
         try:
             if userdata.room:
                 # Send progress update
-                progress_payload = json.dumps(progress_data).encode('utf-8')
-                await userdata.room.local_participant.publish_data(progress_payload, reliable=True)
-                logger.info(f"First question progress update sent: {progress_data}")
+                await publish_data(userdata, progress_data)
+                logger.info("First question progress update sent: %s", payload(progress_data), extra={"category": "payload"})
                 
                 # Send status update
-                status_payload = json.dumps(status_data).encode('utf-8')
-                await userdata.room.local_participant.publish_data(status_payload, reliable=True)
-                logger.info(f"Survey status sent: started - Survey has begun with first question")
+                await publish_data(userdata, status_data)
+                logger.info("Survey status sent: started - Survey has begun with first question")
                 
-                logger.info(f"First question sent to frontend: {first_question[1]}")
+                logger.info("First question sent to frontend: %s", payload(first_question.text))
             else:
                 logger.warning("Room not available in userdata, cannot send first question")
         except Exception as e:
-            logger.error(f"Failed to send first question update: {e}")
+            logger.error("Failed to send first question update: %s", e)
 
 if __name__ == "__main__": 
+    preload_plugins()
     #agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, agent_name="alex-telephony-agent"))
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
+    worker_options = agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        drain_timeout=int(WORKER_DRAIN_TIMEOUT),
+        shutdown_process_timeout=JOB_SHUTDOWN_TIMEOUT,
+    )
+    if WORKER_MODE == "text":
+        worker_options.request_fnc = request_text_job
+    # Admission and the campaign snapshot only matter for a running worker, not for
+    # commands like download-files (run during docker build, without DB credentials)
+    if len(sys.argv) > 1 and sys.argv[1] in WORKER_COMMANDS:
+        admission = AdmissionController()
+        worker_options.load_fnc = admission.load
+        worker_options.load_threshold = admission.config.load_threshold
+        # Shared with job processes through the stats directory set up by the admission controller
+        SnapshotRefresher().start()
+        # Live breaker states and worker metrics, not only per-job snapshots
+        metrics.start_reporter()
+    try:
+        agents.cli.run_app(worker_options)
+    finally:
+        summarize()
\ No newline at end of file
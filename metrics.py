@@ -0,0 +1,102 @@
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.metrics")
+
+# In-process counters and gauges, keyed by (name, sorted label items)
+_counters: dict[tuple, float] = defaultdict(float)
+_gauges: dict[tuple, float] = {}
+_lock = threading.Lock()
+
+# Callables run before each report to refresh gauges that are read rather than pushed
+_collectors: list[Callable[[], None]] = []
+
+# How often each process logs its metrics, besides the snapshot logged when a job ends
+METRICS_REPORT_INTERVAL = float(os.getenv("METRICS_REPORT_INTERVAL", "60"))
+
+
+def _key(name: str, labels: dict[str, Any]) -> tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    """Increment a counter, e.g. inc("circuit_breaker_rejections", dependency="supabase")."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels: Any) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def _format(key: tuple) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def snapshot() -> dict[str, float]:
+    """Return all metrics as {"name{label=value}": value}."""
+    with _lock:
+        items = list(_counters.items()) + list(_gauges.items())
+    return {_format(key): value for key, value in sorted(items)}
+
+
+def add_collector(fn: Callable[[], None]) -> None:
+    """Register a callable that refreshes gauges before each report."""
+    _collectors.append(fn)
+
+
+def report() -> None:
+    """Refresh the collected gauges and log the process metrics."""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), e)
+    metrics = snapshot()
+    if metrics:
+        logger.info("Metrics: %s", metrics, extra={"category": "metrics"})
+
+
+async def log_snapshot(*_) -> None:
+    """Log the process metrics (used as a job shutdown callback)."""
+    report()
+
+
+class MetricsReporter:
+    """Background thread that logs the process metrics every `interval` seconds."""
+
+    def __init__(self, interval: float = METRICS_REPORT_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            report()
+
+
+_reporter: Optional[MetricsReporter] = None
+_reporter_pid: Optional[int] = None
+
+
+def start_reporter() -> None:
+    """Start the periodic report for this process (once; threads do not survive a fork)."""
+    global _reporter, _reporter_pid
+    if _reporter_pid == os.getpid() or METRICS_REPORT_INTERVAL <= 0:
+        return
+    _reporter, _reporter_pid = MetricsReporter(), os.getpid()
+    _reporter.start()
@@ -0,0 +1,28 @@
+-- Session transcripts, written in batches by transcripts.TranscriptBuffer.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "public"."transcript_turn" (
+    "id" "uuid" DEFAULT "gen_random_uuid"() NOT NULL,
+    "survey_submission_id" "uuid" NOT NULL,
+    "turn_index" integer NOT NULL,
+    "speaker" "text" NOT NULL,
+    "text" "text" NOT NULL,
+    "spoken_at" timestamp with time zone DEFAULT "now"(),
+    "created_at" timestamp with time zone DEFAULT "now"(),
+    CONSTRAINT "transcript_turn_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "transcript_turn_speaker_check" CHECK (("speaker" = ANY (ARRAY['participant'::"text", 'agent'::"text"]))),
+    CONSTRAINT "transcript_turn_survey_submission_id_fkey" FOREIGN KEY ("survey_submission_id") REFERENCES "public"."survey_submissions"("id") ON DELETE CASCADE
+);
+
+ALTER TABLE "public"."transcript_turn" OWNER TO "postgres";
+
+CREATE INDEX IF NOT EXISTS "idx_transcript_turn_submission_id" ON "public"."transcript_turn" USING "btree" ("survey_submission_id", "turn_index");
+
+DROP POLICY IF EXISTS "Anyone can submit transcripts" ON "public"."transcript_turn";
+CREATE POLICY "Anyone can submit transcripts" ON "public"."transcript_turn" USING (true) WITH CHECK (true);
+
+ALTER TABLE "public"."transcript_turn" ENABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON TABLE "public"."transcript_turn" TO "anon";
+GRANT ALL ON TABLE "public"."transcript_turn" TO "authenticated";
+GRANT ALL ON TABLE "public"."transcript_turn" TO "service_role";
@@ -0,0 +1,4 @@
+-- Final recording duration, stored by recording.RecordingManager once the egress file is finalized.
+-- Safe to run more than once.
+
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "recording_duration_seconds" numeric;
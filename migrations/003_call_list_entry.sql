@@ -0,0 +1,34 @@
+-- Outbound call lists dialed by dialer.py.
+-- Safe to run more than once.
+
+CREATE TABLE IF NOT EXISTS "public"."call_list_entry" (
+    "id" "uuid" DEFAULT "gen_random_uuid"() NOT NULL,
+    "campaign_id" bigint NOT NULL,
+    "phone_number" "text" NOT NULL,
+    "full_name" "text",
+    "email" "text",
+    "status" "text" DEFAULT 'pending'::"text" NOT NULL,
+    "attempts" integer DEFAULT 0 NOT NULL,
+    "last_outcome" "text",
+    "last_attempt_at" timestamp with time zone,
+    "next_attempt_at" timestamp with time zone DEFAULT "now"() NOT NULL,
+    "room_name" "text",
+    "created_at" timestamp with time zone DEFAULT "now"(),
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    CONSTRAINT "call_list_entry_pkey" PRIMARY KEY ("id"),
+    CONSTRAINT "call_list_entry_status_check" CHECK (("status" = ANY (ARRAY['pending'::"text", 'dialing'::"text", 'retry'::"text", 'answered'::"text", 'failed'::"text"]))),
+    CONSTRAINT "call_list_entry_campaign_id_fkey" FOREIGN KEY ("campaign_id") REFERENCES "public"."campaign"("id") ON DELETE CASCADE
+);
+
+ALTER TABLE "public"."call_list_entry" OWNER TO "postgres";
+
+CREATE INDEX IF NOT EXISTS "idx_call_list_entry_due" ON "public"."call_list_entry" USING "btree" ("campaign_id", "status", "next_attempt_at");
+
+DROP POLICY IF EXISTS "Allow service role to manage call lists" ON "public"."call_list_entry";
+CREATE POLICY "Allow service role to manage call lists" ON "public"."call_list_entry" TO "service_role" USING (true) WITH CHECK (true);
+
+ALTER TABLE "public"."call_list_entry" ENABLE ROW LEVEL SECURITY;
+
+GRANT ALL ON TABLE "public"."call_list_entry" TO "anon";
+GRANT ALL ON TABLE "public"."call_list_entry" TO "authenticated";
+GRANT ALL ON TABLE "public"."call_list_entry" TO "service_role";
@@ -0,0 +1,12 @@
+-- Typed questions (question_types.py) and the structured answer values they produce.
+-- Safe to run more than once.
+
+ALTER TABLE "public"."question" ADD COLUMN IF NOT EXISTS "question_type" "text" DEFAULT 'free_text'::"text" NOT NULL;
+ALTER TABLE "public"."question" ADD COLUMN IF NOT EXISTS "question_options" "jsonb";
+ALTER TABLE "public"."question" DROP CONSTRAINT IF EXISTS "question_question_type_check";
+ALTER TABLE "public"."question"
+    ADD CONSTRAINT "question_question_type_check" CHECK (("question_type" = ANY (ARRAY['free_text'::"text", 'scale'::"text", 'yes_no'::"text", 'multiple_choice'::"text", 'numeric'::"text"])));
+
+ALTER TABLE "public"."answer" ADD COLUMN IF NOT EXISTS "answer_numeric" numeric;
+ALTER TABLE "public"."answer" ADD COLUMN IF NOT EXISTS "answer_boolean" boolean;
+ALTER TABLE "public"."answer" ADD COLUMN IF NOT EXISTS "answer_choice" "text";
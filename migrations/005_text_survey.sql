@@ -0,0 +1,6 @@
+-- Text-only survey campaigns (WORKER_MODE=text).
+-- Safe to run more than once.
+
+ALTER TABLE "public"."campaign" DROP CONSTRAINT IF EXISTS "campaign_campaign_type_check";
+ALTER TABLE "public"."campaign"
+    ADD CONSTRAINT "campaign_campaign_type_check" CHECK (("campaign_type" = ANY (ARRAY['web_survey'::"text", 'phone_survey'::"text", 'text_survey'::"text"])));
@@ -0,0 +1,35 @@
+-- Per-session usage and cost (usage.SessionUsage) and its per-campaign rollup.
+-- Safe to run more than once.
+
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "llm_requests" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "llm_prompt_tokens" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "llm_cached_tokens" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "llm_completion_tokens" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "stt_audio_seconds" numeric;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "tts_characters" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "tool_calls" integer;
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "estimated_cost_usd" numeric;
+-- Used for egress minutes in the view; also added by 002_recording_duration.sql
+ALTER TABLE "public"."survey_submissions" ADD COLUMN IF NOT EXISTS "recording_duration_seconds" numeric;
+
+CREATE OR REPLACE VIEW "public"."campaign_usage" AS
+ SELECT "campaign_id",
+    "count"(*) AS "submissions",
+    "sum"("llm_requests") AS "llm_requests",
+    "sum"("llm_prompt_tokens") AS "llm_prompt_tokens",
+    "sum"("llm_cached_tokens") AS "llm_cached_tokens",
+    "sum"("llm_completion_tokens") AS "llm_completion_tokens",
+    "round"(("sum"("llm_prompt_tokens"))::numeric / NULLIF("sum"("llm_requests"), 0), 1) AS "avg_prompt_tokens_per_request",
+    "round"("sum"("stt_audio_seconds") / 60.0, 2) AS "stt_minutes",
+    "sum"("tts_characters") AS "tts_characters",
+    "sum"("tool_calls") AS "tool_calls",
+    "round"("sum"("recording_duration_seconds") / 60.0, 2) AS "egress_minutes",
+    "sum"("estimated_cost_usd") AS "estimated_cost_usd",
+    "round"("avg"("estimated_cost_usd"), 6) AS "avg_cost_per_submission_usd"
+   FROM "public"."survey_submissions"
+  GROUP BY "campaign_id";
+
+ALTER VIEW "public"."campaign_usage" OWNER TO "postgres";
+
+GRANT ALL ON TABLE "public"."campaign_usage" TO "authenticated";
+GRANT ALL ON TABLE "public"."campaign_usage" TO "service_role";
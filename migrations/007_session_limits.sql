@@ -0,0 +1,6 @@
+-- Per-campaign session limits (session_limits.SessionLimits); NULL uses the worker default.
+-- Safe to run more than once.
+
+ALTER TABLE "public"."campaign" ADD COLUMN IF NOT EXISTS "silence_timeout_seconds" integer;
+ALTER TABLE "public"."campaign" ADD COLUMN IF NOT EXISTS "no_progress_timeout_seconds" integer;
+ALTER TABLE "public"."campaign" ADD COLUMN IF NOT EXISTS "max_call_duration_seconds" integer;
@@ -0,0 +1,277 @@
+"""Question types and local answer validation.
+
+A question may declare a type (question.question_type) with options
+(question.question_options, jsonb):
+
+    free_text        {"max_length": 500}                                  (default, any answer)
+    scale            {"min": 1, "max": 5, "labels": {"1": "poor", "5": "excellent"}}
+    yes_no           {}
+    multiple_choice  {"choices": ["Cattle", "Poultry", "Swine"]}
+    numeric          {"min": 0, "max": 10000, "integer": true, "unit": "animals"}
+
+set_questionnaire_answer validates and normalizes the answer with validate_answer()
+before storing it. An answer that does not fit raises InvalidAnswer with a hint the
+LLM can act on directly, instead of spending more turns working out what went wrong.
+"""
+import re
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+FREE_TEXT, SCALE, YES_NO, MULTIPLE_CHOICE, NUMERIC = "free_text", "scale", "yes_no", "multiple_choice", "numeric"
+QUESTION_TYPES = (FREE_TEXT, SCALE, YES_NO, MULTIPLE_CHOICE, NUMERIC)
+
+YES_WORDS = frozenset({"yes", "y", "yeah", "yep", "sure", "true", "correct", "oui", "absolutely", "definitely"})
+NO_WORDS = frozenset({"no", "n", "nope", "nah", "false", "non"})
+# Negate the answer, or a yes word next to them ("definitely not", "not true")
+NEGATIONS = frozenset({"not", "never", "dont", "didnt", "doesnt", "isnt", "wasnt", "arent", "havent", "hasnt"})
+UNSURE = re.compile(r"\b(?:not sure|not certain|unsure|dont know|no idea|maybe|perhaps)\b")
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+NUMBER_SCALES = {"hundred": 100, "thousand": 1000, "million": 1000000}
+# "twenty five point five", "two and a half": parse_number() rejects these rather than truncating them
+FRACTION_WORDS = re.compile(r"\b(?:point|half|halves|quarters?)\b")
+ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7, "eighth": 8,
+    "ninth": 9, "tenth": 10,
+}
+
+DEFAULT_FREE_TEXT_MAX_LENGTH = 2000
+
+
+class InvalidAnswer(ValueError):
+    """The answer does not fit the question type; str(e) is a correction hint for the LLM."""
+
+
+@dataclass(frozen=True, slots=True)
+class TypedAnswer:
+    """A validated answer: the normalized text plus the structured value for its type."""
+    text: str
+    numeric: Optional[float] = None
+    boolean: Optional[bool] = None
+    choice: Optional[str] = None
+
+
+def parse_number(raw: str) -> Optional[float]:
+    """Parse "42", "3.5", "1,200" or simple English number words ("twenty five", "two hundred").
+
+    Spoken fractions ("point five", "and a half") return None: the number is not truncated.
+    """
+    text = raw.strip().lower()
+    if FRACTION_WORDS.search(text):
+        return None
+    match = re.search(r"-?\d[\d,]*(?:\.\d+)?", text)
+    if match:
+        return float(match.group().replace(",", ""))
+
+    total, current, seen = 0, 0, False
+    for word in re.findall(r"[a-z]+", text.replace("-", " ")):
+        if word in NUMBER_WORDS:
+            current += NUMBER_WORDS[word]
+            seen = True
+        elif word in NUMBER_SCALES:
+            current = max(current, 1) * NUMBER_SCALES[word]
+            if NUMBER_SCALES[word] >= 1000:
+                total, current = total + current, 0
+            seen = True
+        elif word != "and" and seen:
+            break
+    return float(total + current) if seen else None
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
+
+
+def _validate_scale(raw: str, options: Mapping) -> TypedAnswer:
+    low, high = int(options.get("min", 1)), int(options.get("max", 5))
+    labels = {str(k): str(v).lower() for k, v in (options.get("labels") or {}).items()}
+    value = parse_number(raw)
+    if value is None:
+        # Accept a label ("excellent") for its point on the scale
+        for point, label in labels.items():
+            if label and label == raw.strip().lower():
+                value = float(point)
+    if value is None or value != int(value) or not low <= value <= high:
+        labelled = ", ".join(f"{k} = {v}" for k, v in labels.items())
+        labels_hint = f" ({labelled})" if labelled else ""
+        raise InvalidAnswer(f"Expected a whole number from {low} to {high}{labels_hint}, got {raw!r}.")
+    return TypedAnswer(text=_format_number(value), numeric=value)
+
+
+def _validate_yes_no(raw: str, options: Mapping) -> TypedAnswer:
+    words = re.sub(r"[^\w\s]", "", raw.strip().lower()).split()
+    hint = "Ask the participant to answer yes or no."
+    if UNSURE.search(" ".join(words)):
+        raise InvalidAnswer(f"{raw!r} is not a yes or no answer. {hint}")
+    yes = [i for i, word in enumerate(words) if word in YES_WORDS]
+    no = [i for i, word in enumerate(words) if word in NO_WORDS]
+    negations = [i for i, word in enumerate(words) if word in NEGATIONS]
+    if yes and no:
+        raise InvalidAnswer(f"{raw!r} contains both yes and no. {hint}")
+    if yes and negations:
+        # "definitely not" is a no; a negation elsewhere ("yes, not a problem") is ambiguous
+        if not any(abs(i - j) == 1 for i in yes for j in negations):
+            raise InvalidAnswer(f"{raw!r} contains both yes and a negation. {hint}")
+        return TypedAnswer(text="no", boolean=False)
+    if no or negations:
+        return TypedAnswer(text="no", boolean=False)
+    if yes:
+        return TypedAnswer(text="yes", boolean=True)
+    raise InvalidAnswer(f"Expected yes or no, got {raw!r}. {hint}")
+
+
+# Words that carry no meaning when matching an answer against the choices
+FILLER_WORDS = frozenset({"a", "an", "the", "and", "or", "of", "i", "we", "it", "is", "its", "my", "our",
+                          "mostly", "mainly", "option", "choice", "number", "say", "would", "think", "guess"})
+MIN_MATCH_WORD_LENGTH = 3
+
+RANGE_BETWEEN = re.compile(r"^(\d[\d,]*)\s*(?:-|–|to)\s*(\d[\d,]*)\b")
+RANGE_AT_LEAST = re.compile(r"^(\d[\d,]*)\s*(?:\+|or more\b|and (?:up|above|over)\b)")
+RANGE_ABOVE = re.compile(r"^(?:more than|over|above)\s+(\d[\d,]*)\b")
+RANGE_BELOW = re.compile(r"^(?:less than|fewer than|under|below)\s+(\d[\d,]*)\b")
+
+
+def _words(text: str) -> set[str]:
+    """Meaningful words of a text, lowercased with a plural s removed; numbers are left out."""
+    words = set()
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if len(word) < MIN_MATCH_WORD_LENGTH or word in FILLER_WORDS:
+            continue
+        words.add(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+    return words
+
+
+def _choice_position(text: str) -> tuple[Optional[int], bool]:
+    """Position named by an answer that is only a position ("2", "option two", "the second one", "3rd"),
+    and whether it was an ordinal. (None, False) for any other answer."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if words[:1] == ["the"]:
+        words = words[1:]
+    if len(words) == 2 and words[0] in ("option", "choice", "number"):
+        words = words[1:]
+    elif len(words) == 2 and words[1] in ("one", "option", "choice") and _ordinal(words[0]):
+        words = words[:1]
+    if len(words) != 1:
+        return None, False
+    if position := _ordinal(words[0]):
+        return position, True
+    if words[0].isdigit():
+        return int(words[0]), False
+    return NUMBER_WORDS.get(words[0]), False
+
+
+def _ordinal(word: str) -> Optional[int]:
+    if match := re.fullmatch(r"(\d+)(?:st|nd|rd|th)", word):
+        return int(match.group(1))
+    return ORDINALS.get(word)
+
+
+def _choice_range(choice: str) -> Optional[tuple[float, float, bool]]:
+    """(low, high, high_inclusive) for range labels like "1-10", "51+", "under 5"."""
+    text = choice.strip().lower()
+    if match := RANGE_BETWEEN.match(text):
+        return float(match.group(1).replace(",", "")), float(match.group(2).replace(",", "")), True
+    if match := RANGE_AT_LEAST.match(text):
+        return float(match.group(1).replace(",", "")), float("inf"), True
+    if match := RANGE_ABOVE.match(text):
+        return float(match.group(1).replace(",", "")) + 1e-9, float("inf"), True
+    if match := RANGE_BELOW.match(text):
+        return float("-inf"), float(match.group(1).replace(",", "")), False
+    return None
+
+
+def _validate_multiple_choice(raw: str, options: Mapping) -> TypedAnswer:
+    choices = [str(choice) for choice in options.get("choices") or []]
+    text = raw.strip().lower()
+    listed = "; ".join(f"{i}) {choice}" for i, choice in enumerate(choices, start=1))
+
+    matches = [c for c in choices if c.lower() == text]
+    position, ordinal = _choice_position(text) if not matches else (None, False)
+    ranges = [_choice_range(c) for c in choices]
+    number = parse_number(text) if not matches and not ordinal else None
+    if ordinal:
+        # "the second one" picks by position, whatever the choices are
+        if 1 <= position <= len(choices):
+            matches = [choices[position - 1]]
+    elif number is not None and choices and all(ranges):
+        # Range buckets ("1-10", "11-50", "51+"): a number picks the bucket that contains it
+        matches = [c for c, (low, high, inclusive) in zip(choices, ranges)
+                   if low <= number and (number <= high if inclusive else number < high)]
+        if not matches:
+            raise InvalidAnswer(f"{_format_number(number)} is in none of the ranges: {listed}. Confirm the value with the participant.")
+    elif position is not None and not any(re.search(r"\d", c) for c in choices):
+        # "2", "option 2" or "number two" picks by position; a number inside a longer
+        # answer ("we have two barns") does not
+        if 1 <= position <= len(choices):
+            matches = [choices[position - 1]]
+    if not matches:
+        # Whole words only: the answer names a choice ("mostly poultry"), or every word of
+        # the answer belongs to one choice ("dairy" for "Dairy cattle")
+        answer_words = _words(text)
+        if answer_words:
+            matches = [c for c in choices if (_words(c) and _words(c) <= answer_words) or answer_words <= _words(c)]
+    if len(matches) == 1:
+        return TypedAnswer(text=matches[0], choice=matches[0])
+    if matches:
+        raise InvalidAnswer(f"{raw!r} matches several choices ({'; '.join(matches)}). Ask which one: {listed}.")
+    raise InvalidAnswer(f"{raw!r} is not one of the choices: {listed}. Pass the exact choice text.")
+
+
+def _validate_numeric(raw: str, options: Mapping) -> TypedAnswer:
+    value = parse_number(raw)
+    unit = f" ({options['unit']})" if options.get("unit") else ""
+    if value is None:
+        raise InvalidAnswer(f"Expected a number{unit}, got {raw!r}. Pass the number in digits.")
+    if options.get("integer") and value != int(value):
+        raise InvalidAnswer(f"Expected a whole number{unit}, got {raw!r}.")
+    low, high = options.get("min"), options.get("max")
+    if (low is not None and value < low) or (high is not None and value > high):
+        bounds = f"between {low} and {high}" if low is not None and high is not None else (
+            f"at least {low}" if low is not None else f"at most {high}")
+        raise InvalidAnswer(f"Expected a number {bounds}{unit}, got {_format_number(value)}. Confirm the value with the participant.")
+    return TypedAnswer(text=_format_number(value), numeric=value)
+
+
+def _validate_free_text(raw: str, options: Mapping) -> TypedAnswer:
+    text = raw.strip()
+    if not text:
+        raise InvalidAnswer("The answer is empty. Pass the participant's answer.")
+    max_length = int(options.get("max_length", DEFAULT_FREE_TEXT_MAX_LENGTH))
+    if len(text) > max_length:
+        raise InvalidAnswer(f"The answer is longer than {max_length} characters. Pass a summary of it.")
+    return TypedAnswer(text=text)
+
+
+VALIDATORS = {
+    FREE_TEXT: _validate_free_text,
+    SCALE: _validate_scale,
+    YES_NO: _validate_yes_no,
+    MULTIPLE_CHOICE: _validate_multiple_choice,
+    NUMERIC: _validate_numeric,
+}
+
+
+def validate_answer(question_type: Optional[str], options: Optional[Mapping], raw: str) -> TypedAnswer:
+    """Validate and normalize an answer; raises InvalidAnswer with a correction hint."""
+    validator = VALIDATORS.get(question_type or FREE_TEXT, _validate_free_text)
+    return validator(str(raw), options or {})
+
+
+def describe_expected(question_type: Optional[str], options: Optional[Mapping]) -> Optional[str]:
+    """Short description of the expected answer, used in the agent prompt."""
+    options = options or {}
+    if question_type == SCALE:
+        return f"a whole number from {options.get('min', 1)} to {options.get('max', 5)}"
+    if question_type == YES_NO:
+        return "yes or no"
+    if question_type == MULTIPLE_CHOICE:
+        return "one of: " + "; ".join(str(c) for c in options.get("choices") or [])
+    if question_type == NUMERIC:
+        unit = f" ({options['unit']})" if options.get("unit") else ""
+        return f"a number{unit}"
+    return None
@@ -1,15 +1,27 @@
 from dotenv import load_dotenv
-import logging
+import asyncio
 import os
 import re
 from datetime import datetime
+from typing import Optional
 from livekit.protocol import egress
 from livekit import api
+import metrics
+from logging_config import get_logger
+from resilience import EGRESS_CALL_TIMEOUT, guarded_call
 from user_data import UserData
 
 load_dotenv()
-logger = logging.getLogger("futures_survey_assistant")
-logger.setLevel(logging.INFO)
+logger = get_logger()
+
+# LiveKit kills a job process whose shutdown takes longer than this (WorkerOptions.shutdown_process_timeout)
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "60"))
+# How long to wait for LiveKit to finalize the file after the egress is stopped, kept below
+# JOB_SHUTDOWN_TIMEOUT so the other shutdown callbacks still have time to run
+RECORDING_FINALIZE_TIMEOUT = min(float(os.getenv("RECORDING_FINALIZE_TIMEOUT", "45")), JOB_SHUTDOWN_TIMEOUT - 15)
+RECORDING_POLL_INTERVAL = 2.0
+# A start request that timed out may still create the egress on the server: look for it again after this long
+ORPHAN_EGRESS_RECHECK = 5.0
 
 def get_folder_from_room_prefix(room_name: str) -> str:
     """Extract prefix from room name for folder name"""
@@ -25,31 +37,36 @@ def get_folder_from_room_prefix(room_name: str) -> str:
         # If no pattern found, use the whole room name as fallback
         return room_name
 
+def create_livekit_api():
+    """Create a LiveKit API client from the environment, or return None if credentials are missing."""
+    livekit_url = os.getenv("LIVEKIT_URL")
+    livekit_api_key = os.getenv("LIVEKIT_API_KEY")
+    livekit_api_secret = os.getenv("LIVEKIT_API_SECRET")
+    if not all([livekit_url, livekit_api_key, livekit_api_secret]):
+        return None
+    return api.LiveKitAPI(
+        url=livekit_url,
+        api_key=livekit_api_key,
+        api_secret=livekit_api_secret
+    )
+
 async def start_s3_recording(room_name: str, userdata: UserData) -> bool:
     """Start recording using LiveKit Egress API with S3 storage"""
     lkapi = None
     try:
         # Get credentials from environment
-        livekit_url = os.getenv("LIVEKIT_URL")
-        livekit_api_key = os.getenv("LIVEKIT_API_KEY")
-        livekit_api_secret = os.getenv("LIVEKIT_API_SECRET")
-        
         aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
         aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
         aws_region = os.getenv("AWS_REGION", "us-east-1")
         s3_bucket = "s3-photo-ai-saas"
         
-        if not all([livekit_url, livekit_api_key, livekit_api_secret, aws_access_key, aws_secret_key]):
+        # Create LiveKit API client
+        lkapi = create_livekit_api()
+        
+        if not lkapi or not all([aws_access_key, aws_secret_key]):
             logger.error("Missing LiveKit or AWS credentials")
             return False
         
-        # Create LiveKit API client
-        lkapi = api.LiveKitAPI(
-            url=livekit_url,
-            api_key=livekit_api_key,
-            api_secret=livekit_api_secret
-        )
-        
         # Generate folder name based on room prefix
         folder_name = get_folder_from_room_prefix(room_name)
         
@@ -98,8 +115,8 @@ async def start_s3_recording(room_name: str, userdata: UserData) -> bool:
         
         if response.egress_id:
             userdata.recording_id = response.egress_id
-            logger.info(f"S3 Recording started successfully. Egress ID: {response.egress_id}")
-            logger.info(f"Recording will be saved to: s3://{s3_bucket}/{filepath}")
+            logger.info("S3 Recording started successfully. Egress ID: %s", response.egress_id)
+            logger.info("Recording will be saved to: s3://%s/%s", s3_bucket, filepath)
             userdata.s3_recording_url = f"s3://{s3_bucket}/{filepath}"
             return True
         else:
@@ -107,7 +124,7 @@ async def start_s3_recording(room_name: str, userdata: UserData) -> bool:
             return False
             
     except Exception as e:
-        logger.error(f"S3 recording error: {e}")
+        logger.error("S3 recording error: %s", e)
         return False
     finally:
         # Always close the API client to prevent connection leaks
@@ -116,4 +133,147 @@ async def start_s3_recording(room_name: str, userdata: UserData) -> bool:
                 await lkapi.aclose()
                 logger.debug("LiveKit API client closed successfully")
             except Exception as e:
-                logger.warning(f"Error closing LiveKit API client: {e}")
\ No newline at end of file
+                logger.warning("Error closing LiveKit API client: %s", e)
+
+async def stop_egress(lkapi, egress_id: str) -> bool:
+    """Stop an egress. Returns False if it had already ended, which is not an egress failure."""
+    try:
+        await lkapi.egress.stop_egress(api.StopEgressRequest(egress_id=egress_id))
+        return True
+    except api.TwirpError as e:
+        if e.code in (api.TwirpErrorCode.FAILED_PRECONDITION, api.TwirpErrorCode.NOT_FOUND):
+            logger.info("Recording %s already ended: %s", egress_id, e.message)
+            return False
+        raise
+
+async def stop_room_egresses(room_name: str) -> int:
+    """Stop every active egress of a room. Returns how many were stopped."""
+    lkapi = create_livekit_api()
+    if not lkapi:
+        return 0
+    stopped = 0
+    try:
+        response = await asyncio.wait_for(
+            lkapi.egress.list_egress(api.ListEgressRequest(room_name=room_name, active=True)), EGRESS_CALL_TIMEOUT)
+        for info in response.items:
+            if await asyncio.wait_for(stop_egress(lkapi, info.egress_id), EGRESS_CALL_TIMEOUT):
+                stopped += 1
+    except Exception as e:
+        logger.warning("Could not check room %s for egresses to stop: %s", room_name, e)
+    finally:
+        await lkapi.aclose()
+    return stopped
+
+class RecordingManager:
+    """Stops a session's egress as soon as the survey is over and, once LiveKit has
+    finalized the file, stores its final S3 URL and duration on the survey submission."""
+
+    def __init__(self, userdata: UserData):
+        self.userdata = userdata
+        self.stop_reason: Optional[str] = None
+        self._stop_task: Optional[asyncio.Task] = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._finalize_task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self.userdata.recording_id) and self.stop_reason is None
+
+    def stop_soon(self, reason: str) -> None:
+        """Schedule stop() from a synchronous event handler."""
+        if self.active and self._stop_task is None:
+            # Kept so that aclose() waits for it instead of returning while stop_egress is in flight
+            self._stop_task = asyncio.create_task(self.stop(reason))
+
+    def discard_failed_start(self, room_name: str) -> None:
+        """The start request failed or timed out, but the egress may have started anyway
+        (the client gave up, not the server). Stop any egress of the room, now and once
+        more after ORPHAN_EGRESS_RECHECK, so it does not keep recording and billing."""
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._stop_orphaned_egresses(room_name))
+
+    async def _stop_orphaned_egresses(self, room_name: str) -> None:
+        for delay in (0.0, ORPHAN_EGRESS_RECHECK):
+            await asyncio.sleep(delay)
+            stopped = await stop_room_egresses(room_name)
+            if stopped:
+                logger.warning("Stopped %s egress(es) of room %s started by a failed start request", stopped, room_name)
+                metrics.inc("orphan_egress_stopped", stopped)
+
+    async def stop(self, reason: str) -> None:
+        """Stop the egress (once) and start tracking it until the file is finalized."""
+        if not self.active:
+            return
+        self.stop_reason = reason
+        egress_id = self.userdata.recording_id
+
+        lkapi = create_livekit_api()
+        if not lkapi:
+            logger.error("Missing LiveKit credentials, cannot stop recording %s", egress_id)
+            return
+        try:
+            # Bounded and behind the egress breaker: a slow egress API must not hold up the end of the survey
+            stopped = await guarded_call("egress", stop_egress, lkapi, egress_id,
+                                         timeout=EGRESS_CALL_TIMEOUT, fallback=False)
+        finally:
+            await lkapi.aclose()
+        if stopped:
+            logger.info("Stopped recording %s (%s)", egress_id, reason)
+        # Still track it to completion: it may already be ending, or LiveKit ends it with the room
+        self._finalize_task = asyncio.create_task(self._finalize(egress_id))
+
+    async def _finalize(self, egress_id: str) -> None:
+        final_statuses = (egress.EGRESS_COMPLETE, egress.EGRESS_FAILED, egress.EGRESS_ABORTED, egress.EGRESS_LIMIT_REACHED)
+        lkapi = create_livekit_api()
+        if not lkapi:
+            return
+        from drain import time_left
+
+        info = None
+        try:
+            loop = asyncio.get_running_loop()
+            # A draining worker kills its jobs at the drain deadline
+            drain_left = time_left()
+            deadline = loop.time() + min(RECORDING_FINALIZE_TIMEOUT, drain_left if drain_left is not None else RECORDING_FINALIZE_TIMEOUT)
+            while loop.time() < deadline:
+                response = await lkapi.egress.list_egress(api.ListEgressRequest(egress_id=egress_id))
+                info = response.items[0] if response.items else None
+                if info is None or info.status in final_statuses:
+                    break
+                await asyncio.sleep(RECORDING_POLL_INTERVAL)
+        except Exception as e:
+            logger.error("Error tracking recording %s: %s", egress_id, e)
+        finally:
+            await lkapi.aclose()
+
+        if info is None or info.status != egress.EGRESS_COMPLETE or not info.file_results:
+            logger.warning("Recording %s was not finalized (status: %s)", egress_id, info.status if info else "unknown")
+            return
+
+        file_info = info.file_results[0]
+        s3_recording_url = self.userdata.s3_recording_url or file_info.location
+        duration_seconds = round(file_info.duration / 1e9, 3)
+        logger.info("Recording %s finalized: %s (%ss)", egress_id, s3_recording_url, duration_seconds)
+
+        submission_id = self.userdata.submission_id
+        if submission_id is None:
+            # The session never got a submission (database unavailable throughout)
+            logger.warning("No submission to store recording %s on, skipping", egress_id)
+        else:
+            from db_manager import update_survey_submission_recording
+            await asyncio.to_thread(update_survey_submission_recording, submission_id, s3_recording_url, duration_seconds)
+
+        # Egress minutes are part of the session's cost estimate
+        if self.userdata.usage is not None:
+            self.userdata.usage.egress_seconds = duration_seconds
+            await self.userdata.usage.save()
+
+    async def aclose(self, *_) -> None:
+        """Stop the egress if still running and wait for the final file to be recorded."""
+        if self._stop_task is not None:
+            await self._stop_task
+        if self._cleanup_task is not None:
+            await self._cleanup_task
+        await self.stop("session_closed")
+        if self._finalize_task is not None:
+            await self._finalize_task
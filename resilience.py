@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Optional
+
+import metrics
+from admission import get_stats_dir
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.resilience")
+
+# Consecutive failures that open a breaker, and how long it stays open before a trial call
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Per-call timeouts, capped further by the session's remaining startup budget
+DB_CALL_TIMEOUT = float(os.getenv("DB_CALL_TIMEOUT", "3"))
+EGRESS_CALL_TIMEOUT = float(os.getenv("EGRESS_CALL_TIMEOUT", "5"))
+DATA_CHANNEL_TIMEOUT = float(os.getenv("DATA_CHANNEL_TIMEOUT", "2"))
+SESSION_STARTUP_BUDGET = float(os.getenv("SESSION_STARTUP_BUDGET", "10"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Shared state is re-read from disk at most this often
+STATE_CACHE_SECONDS = 1.0
+
+_MISSING = object()
+
+
+class DependencyUnavailable(Exception):
+    """Raised when a guarded call is rejected by an open breaker, times out or fails."""
+
+    def __init__(self, dependency: str, reason: str):
+        super().__init__(f"{dependency} unavailable: {reason}")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Per-dependency circuit breaker.
+
+    Once a dependency has failed `failure_threshold` times in a row, calls fail fast for
+    `reset_timeout` seconds, after which a single trial call decides whether to close it.
+    A shared breaker keeps its state in a small file in the worker's stats directory, so
+    every job process of a worker sees it; use it for dependencies all sessions share
+    (Supabase, egress). A breaker with shared=False lives in memory and only guards the
+    caller's own resource, such as a session's data channel.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, shared: bool = True):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._path = os.path.join(get_stats_dir(), f"breaker-{name}.json") if shared else None
+        self._state = {"failures": 0, "opened_until": 0.0}
+        self._read_at = 0.0
+        self._trial_in_flight = False
+        self._last_state = CLOSED
+
+    def _load(self) -> dict:
+        now = time.monotonic()
+        if self._path is not None and now - self._read_at >= STATE_CACHE_SECONDS:
+            self._read_at = now
+            try:
+                with open(self._path) as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return self._state
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            tmp_path = f"{self._path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning("Could not save breaker state for %s: %s", self.name, e)
+        self._read_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        state = self._load()
+        if state["failures"] < self.failure_threshold:
+            current = CLOSED
+        else:
+            current = OPEN if time.time() < state["opened_until"] else HALF_OPEN
+        if current != self._last_state:
+            self._transition(current)
+        return current
+
+    def _transition(self, new_state: str) -> None:
+        """Publish a state change as it is observed (also when another process caused it)."""
+        previous, self._last_state = self._last_state, new_state
+        metrics.set_gauge("circuit_breaker_state", STATE_GAUGE[new_state], dependency=self.name)
+        metrics.inc("circuit_breaker_transitions", dependency=self.name, to=new_state)
+        log = logger.warning if new_state == OPEN else logger.info
+        log("Circuit breaker %s: %s -> %s", self.name, previous, new_state, extra={"category": "metrics"})
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Give back a trial call granted by allow() that was never made."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        self._trial_in_flight = False
+        if self._load()["failures"]:
+            self._state = {"failures": 0, "opened_until": 0.0}
+            self._save()
+            self.state  # publishes the transition back to closed
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        state = self._load()
+        state["failures"] = state.get("failures", 0) + 1
+        if state["failures"] >= self.failure_threshold:
+            if time.time() >= state.get("opened_until", 0.0):
+                metrics.inc("circuit_breaker_opened", dependency=self.name)
+            state["opened_until"] = time.time() + self.reset_timeout
+        self._state = state
+        self._save()
+        self.state  # publishes the transition to open
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The worker-wide shared breaker for a dependency."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def report_breakers() -> None:
+    """Refresh the state gauge of every shared breaker of the worker (metrics collector).
+
+    Reads the breaker files, so the worker process reports breakers its jobs opened.
+    """
+    try:
+        names = os.listdir(get_stats_dir())
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.startswith("breaker-") and name.endswith(".json"):
+            breaker = get_breaker(name[len("breaker-"):-len(".json")])
+            metrics.set_gauge("circuit_breaker_state", STATE_GAUGE[breaker.state], dependency=breaker.name)
+
+
+metrics.add_collector(report_breakers)
+
+
+class DeadlineBudget:
+    """Time left for a session to get through startup; each step may only use what remains."""
+
+    def __init__(self, total_seconds: float = SESSION_STARTUP_BUDGET):
+        self.total_seconds = total_seconds
+        self.deadline = time.monotonic() + total_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+async def guarded_call(dependency: str, fn: Callable, *args, budget: Optional[DeadlineBudget] = None,
+                       timeout: Optional[float] = None, fallback: Any = _MISSING,
+                       breaker: Optional[CircuitBreaker] = None, **kwargs) -> Any:
+    """Call fn through the dependency's circuit breaker with a bounded timeout.
+
+    The breaker is the dependency's shared one unless a (session-local) `breaker` is given.
+
+    Blocking functions run in a worker thread. The timeout is `timeout` capped by the
+    remaining `budget`. If the breaker is open, the budget is spent, or the call fails
+    or times out, `fallback` is returned (called first if it is callable); without a
+    fallback DependencyUnavailable is raised.
+    """
+    breaker = breaker or get_breaker(dependency)
+    call_timeout = budget.timeout(timeout) if budget is not None else timeout
+
+    def unavailable(reason: str):
+        metrics.inc("dependency_unavailable", dependency=dependency, reason=reason)
+        if fallback is _MISSING:
+            raise DependencyUnavailable(dependency, reason)
+        logger.warning("%s unavailable (%s), using fallback", dependency, reason)
+        return fallback() if callable(fallback) else fallback
+
+    if not breaker.allow():
+        return unavailable("circuit_open")
+    if call_timeout is not None and call_timeout <= 0:
+        breaker.release_trial()
+        return unavailable("deadline_exceeded")
+
+    if asyncio.iscoroutinefunction(fn):
+        call = fn(*args, **kwargs)
+    else:
+        call = asyncio.to_thread(fn, *args, **kwargs)
+    try:
+        result = await asyncio.wait_for(call, timeout=call_timeout)
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        return unavailable("timeout")
+    except Exception as e:
+        logger.error("%s call %s failed: %s", dependency, getattr(fn, "__name__", fn), e)
+        breaker.record_failure()
+        return unavailable("error")
+    breaker.record_success()
+    return result
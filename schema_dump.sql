@@ -94,7 +94,10 @@ CREATE TABLE IF NOT EXISTS "public"."answer" (
     "answer_text" "text" NOT NULL,
     "answered_at" timestamp with time zone DEFAULT "now"(),
     "created_at" timestamp with time zone DEFAULT "now"(),
-    "updated_at" timestamp with time zone DEFAULT "now"()
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    "answer_numeric" numeric,
+    "answer_boolean" boolean,
+    "answer_choice" "text"
 );
 
 
@@ -116,13 +119,37 @@ CREATE TABLE IF NOT EXISTS "public"."campaign" (
     "campaign_type" "text" DEFAULT 'web_survey'::"text" NOT NULL,
     "campaign_uri" "text",
     "user_id" "uuid",
-    CONSTRAINT "campaign_campaign_type_check" CHECK (("campaign_type" = ANY (ARRAY['web_survey'::"text", 'phone_survey'::"text"])))
+    "silence_timeout_seconds" integer,
+    "no_progress_timeout_seconds" integer,
+    "max_call_duration_seconds" integer,
+    CONSTRAINT "campaign_campaign_type_check" CHECK (("campaign_type" = ANY (ARRAY['web_survey'::"text", 'phone_survey'::"text", 'text_survey'::"text"])))
 );
 
 
 ALTER TABLE "public"."campaign" OWNER TO "postgres";
 
 
+CREATE TABLE IF NOT EXISTS "public"."call_list_entry" (
+    "id" "uuid" DEFAULT "gen_random_uuid"() NOT NULL,
+    "campaign_id" bigint NOT NULL,
+    "phone_number" "text" NOT NULL,
+    "full_name" "text",
+    "email" "text",
+    "status" "text" DEFAULT 'pending'::"text" NOT NULL,
+    "attempts" integer DEFAULT 0 NOT NULL,
+    "last_outcome" "text",
+    "last_attempt_at" timestamp with time zone,
+    "next_attempt_at" timestamp with time zone DEFAULT "now"() NOT NULL,
+    "room_name" "text",
+    "created_at" timestamp with time zone DEFAULT "now"(),
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    CONSTRAINT "call_list_entry_status_check" CHECK (("status" = ANY (ARRAY['pending'::"text", 'dialing'::"text", 'retry'::"text", 'answered'::"text", 'failed'::"text"])))
+);
+
+
+ALTER TABLE "public"."call_list_entry" OWNER TO "postgres";
+
+
 CREATE SEQUENCE IF NOT EXISTS "public"."campaign_id_seq"
     START WITH 1
     INCREMENT BY 1
@@ -172,7 +199,10 @@ CREATE TABLE IF NOT EXISTS "public"."question" (
     "question_text" "text" NOT NULL,
     "question_order" integer NOT NULL,
     "created_at" timestamp with time zone DEFAULT "now"(),
-    "updated_at" timestamp with time zone DEFAULT "now"()
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    "question_type" "text" DEFAULT 'free_text'::"text" NOT NULL,
+    "question_options" "jsonb",
+    CONSTRAINT "question_question_type_check" CHECK (("question_type" = ANY (ARRAY['free_text'::"text", 'scale'::"text", 'yes_no'::"text", 'multiple_choice'::"text", 'numeric'::"text"])))
 );
 
 
@@ -224,13 +254,58 @@ CREATE TABLE IF NOT EXISTS "public"."survey_submissions" (
     "s3_recording_url" "text",
     "created_at" timestamp with time zone DEFAULT "now"(),
     "updated_at" timestamp with time zone DEFAULT "now"(),
-    "call_timestamp" timestamp with time zone DEFAULT "now"()
+    "call_timestamp" timestamp with time zone DEFAULT "now"(),
+    "recording_duration_seconds" numeric,
+    "llm_requests" integer,
+    "llm_prompt_tokens" integer,
+    "llm_cached_tokens" integer,
+    "llm_completion_tokens" integer,
+    "stt_audio_seconds" numeric,
+    "tts_characters" integer,
+    "tool_calls" integer,
+    "estimated_cost_usd" numeric
 );
 
 
 ALTER TABLE "public"."survey_submissions" OWNER TO "postgres";
 
 
+CREATE OR REPLACE VIEW "public"."campaign_usage" AS
+ SELECT "campaign_id",
+    "count"(*) AS "submissions",
+    "sum"("llm_requests") AS "llm_requests",
+    "sum"("llm_prompt_tokens") AS "llm_prompt_tokens",
+    "sum"("llm_cached_tokens") AS "llm_cached_tokens",
+    "sum"("llm_completion_tokens") AS "llm_completion_tokens",
+    "round"(("sum"("llm_prompt_tokens"))::numeric / NULLIF("sum"("llm_requests"), 0), 1) AS "avg_prompt_tokens_per_request",
+    "round"("sum"("stt_audio_seconds") / 60.0, 2) AS "stt_minutes",
+    "sum"("tts_characters") AS "tts_characters",
+    "sum"("tool_calls") AS "tool_calls",
+    "round"("sum"("recording_duration_seconds") / 60.0, 2) AS "egress_minutes",
+    "sum"("estimated_cost_usd") AS "estimated_cost_usd",
+    "round"("avg"("estimated_cost_usd"), 6) AS "avg_cost_per_submission_usd"
+   FROM "public"."survey_submissions"
+  GROUP BY "campaign_id";
+
+
+ALTER VIEW "public"."campaign_usage" OWNER TO "postgres";
+
+
+CREATE TABLE IF NOT EXISTS "public"."transcript_turn" (
+    "id" "uuid" DEFAULT "gen_random_uuid"() NOT NULL,
+    "survey_submission_id" "uuid" NOT NULL,
+    "turn_index" integer NOT NULL,
+    "speaker" "text" NOT NULL,
+    "text" "text" NOT NULL,
+    "spoken_at" timestamp with time zone DEFAULT "now"(),
+    "created_at" timestamp with time zone DEFAULT "now"(),
+    CONSTRAINT "transcript_turn_speaker_check" CHECK (("speaker" = ANY (ARRAY['participant'::"text", 'agent'::"text"])))
+);
+
+
+ALTER TABLE "public"."transcript_turn" OWNER TO "postgres";
+
+
 ALTER TABLE ONLY "public"."campaign" ALTER COLUMN "id" SET DEFAULT "nextval"('"public"."campaign_id_seq"'::"regclass");
 
 
@@ -288,6 +363,20 @@ ALTER TABLE ONLY "public"."survey_submissions"
 
 
 
+ALTER TABLE ONLY "public"."call_list_entry"
+    ADD CONSTRAINT "call_list_entry_pkey" PRIMARY KEY ("id");
+
+
+
+ALTER TABLE ONLY "public"."transcript_turn"
+    ADD CONSTRAINT "transcript_turn_pkey" PRIMARY KEY ("id");
+
+
+
+CREATE INDEX "idx_call_list_entry_due" ON "public"."call_list_entry" USING "btree" ("campaign_id", "status", "next_attempt_at");
+
+
+
 CREATE INDEX "idx_campaign_id" ON "public"."question" USING "btree" ("campaign_id");
 
 
@@ -316,6 +405,10 @@ CREATE INDEX "idx_survey_invitations_token" ON "public"."survey_invitations" USI
 
 
 
+CREATE INDEX "idx_transcript_turn_submission_id" ON "public"."transcript_turn" USING "btree" ("survey_submission_id", "turn_index");
+
+
+
 CREATE OR REPLACE TRIGGER "update_answer_updated_at" BEFORE UPDATE ON "public"."answer" FOR EACH ROW EXECUTE FUNCTION "public"."update_updated_at_column"();
 
 
@@ -363,6 +456,16 @@ ALTER TABLE ONLY "public"."survey_invitations"
 
 
 
+ALTER TABLE ONLY "public"."call_list_entry"
+    ADD CONSTRAINT "call_list_entry_campaign_id_fkey" FOREIGN KEY ("campaign_id") REFERENCES "public"."campaign"("id") ON DELETE CASCADE;
+
+
+
+ALTER TABLE ONLY "public"."transcript_turn"
+    ADD CONSTRAINT "transcript_turn_survey_submission_id_fkey" FOREIGN KEY ("survey_submission_id") REFERENCES "public"."survey_submissions"("id") ON DELETE CASCADE;
+
+
+
 CREATE POLICY "Allow anonymous delete access to campaign_room_mapping" ON "public"."campaign_room_mapping" FOR DELETE USING (true);
 
 
@@ -407,6 +510,10 @@ CREATE POLICY "Allow service role to select campaign room mappings" ON "public".
 
 
 
+CREATE POLICY "Allow service role to manage call lists" ON "public"."call_list_entry" TO "service_role" USING (true) WITH CHECK (true);
+
+
+
 CREATE POLICY "Allow service role to select campaigns" ON "public"."campaign" FOR SELECT TO "service_role" USING (true);
 
 
@@ -423,6 +530,10 @@ CREATE POLICY "Anyone can submit survey data" ON "public"."survey_submissions" U
 
 
 
+CREATE POLICY "Anyone can submit transcripts" ON "public"."transcript_turn" USING (true) WITH CHECK (true);
+
+
+
 CREATE POLICY "Users can create survey invitations" ON "public"."survey_invitations" FOR INSERT TO "authenticated" WITH CHECK (("auth"."uid"() = "user_id"));
 
 
@@ -458,6 +569,9 @@ CREATE POLICY "Users can view their own invitations" ON "public"."survey_invitat
 ALTER TABLE "public"."answer" ENABLE ROW LEVEL SECURITY;
 
 
+ALTER TABLE "public"."call_list_entry" ENABLE ROW LEVEL SECURITY;
+
+
 ALTER TABLE "public"."campaign" ENABLE ROW LEVEL SECURITY;
 
 
@@ -473,6 +587,9 @@ ALTER TABLE "public"."survey_invitations" ENABLE ROW LEVEL SECURITY;
 ALTER TABLE "public"."survey_submissions" ENABLE ROW LEVEL SECURITY;
 
 
+ALTER TABLE "public"."transcript_turn" ENABLE ROW LEVEL SECURITY;
+
+
 
 
 ALTER PUBLICATION "supabase_realtime" OWNER TO "postgres";
@@ -716,6 +833,23 @@ GRANT ALL ON TABLE "public"."survey_submissions" TO "service_role";
 
 
 
+GRANT ALL ON TABLE "public"."campaign_usage" TO "authenticated";
+GRANT ALL ON TABLE "public"."campaign_usage" TO "service_role";
+
+
+
+GRANT ALL ON TABLE "public"."call_list_entry" TO "anon";
+GRANT ALL ON TABLE "public"."call_list_entry" TO "authenticated";
+GRANT ALL ON TABLE "public"."call_list_entry" TO "service_role";
+
+
+
+GRANT ALL ON TABLE "public"."transcript_turn" TO "anon";
+GRANT ALL ON TABLE "public"."transcript_turn" TO "authenticated";
+GRANT ALL ON TABLE "public"."transcript_turn" TO "service_role";
+
+
+
 
 
 
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Mapping, Optional
+
+import metrics
+from drain import must_finalize
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.limits")
+
+# Worker defaults (seconds, 0 disables), overridden per campaign by the campaign columns
+# silence_timeout_seconds, no_progress_timeout_seconds and max_call_duration_seconds
+SESSION_SILENCE_TIMEOUT = float(os.getenv("SESSION_SILENCE_TIMEOUT", "60"))
+SESSION_NO_PROGRESS_TIMEOUT = float(os.getenv("SESSION_NO_PROGRESS_TIMEOUT", "300"))
+SESSION_MAX_CALL_DURATION = float(os.getenv("SESSION_MAX_CALL_DURATION", "1800"))
+
+WATCHDOG_INTERVAL = 1.0
+
+SILENCE, NO_PROGRESS, MAX_DURATION = "silence_timeout", "no_progress_timeout", "max_call_duration"
+WORKER_DRAIN = "worker_drain"
+
+
+@dataclass(frozen=True, slots=True)
+class SessionLimits:
+    silence_timeout: float = SESSION_SILENCE_TIMEOUT
+    no_progress_timeout: float = SESSION_NO_PROGRESS_TIMEOUT
+    max_call_duration: float = SESSION_MAX_CALL_DURATION
+
+    @classmethod
+    def for_campaign(cls, campaign: Mapping) -> "SessionLimits":
+        def limit(column: str, default: float) -> float:
+            value = campaign.get(column)
+            return float(value) if value is not None else default
+
+        return cls(
+            silence_timeout=limit("silence_timeout_seconds", SESSION_SILENCE_TIMEOUT),
+            no_progress_timeout=limit("no_progress_timeout_seconds", SESSION_NO_PROGRESS_TIMEOUT),
+            max_call_duration=limit("max_call_duration_seconds", SESSION_MAX_CALL_DURATION),
+        )
+
+
+class SessionWatchdog:
+    """Ends sessions that stopped making progress: the participant has been silent for
+    silence_timeout, no new answer came in for no_progress_timeout, or the call reached
+    max_call_duration. It also ends sessions that would outlast a worker drain
+    (WORKER_DRAIN). on_limit(reason) is called once, with the name of the limit hit.
+    """
+
+    def __init__(self, userdata, limits: SessionLimits, on_limit: Callable[[str], Awaitable[None]]):
+        self.userdata = userdata
+        self.limits = limits
+        self.on_limit = on_limit
+        now = time.monotonic()
+        self.started_at = now
+        self.last_activity_at = now
+        self.last_progress_at = now
+        self._answered = 0
+        self._agent_speaking = False
+        self._user_speaking = False
+        self._task: Optional[asyncio.Task] = None
+        self.limit_hit: Optional[str] = None
+
+    def attach(self, session) -> None:
+        session.on("user_state_changed", self._on_user_state_changed)
+        session.on("agent_state_changed", self._on_agent_state_changed)
+        # Text sessions have no VAD: typed messages count as activity
+        session.on("conversation_item_added", self._on_conversation_item_added)
+        self._task = asyncio.create_task(self._run())
+
+    def _on_user_state_changed(self, event) -> None:
+        # A long answer is not silence: count from the end of the user's turn too
+        self._user_speaking = event.new_state == "speaking"
+        self.last_activity_at = time.monotonic()
+
+    def _on_agent_state_changed(self, event) -> None:
+        # Silence is counted from the end of the agent's turn, not while it is talking
+        self._agent_speaking = event.new_state == "speaking"
+        self.last_activity_at = time.monotonic()
+
+    def _on_conversation_item_added(self, event) -> None:
+        if getattr(event.item, "role", None) == "user":
+            self.last_activity_at = time.monotonic()
+
+    def check(self) -> Optional[str]:
+        """Return the limit that has been exceeded, if any."""
+        now = time.monotonic()
+        answered = len(self.userdata.questionnaire_answers or ())
+        if answered != self._answered:
+            self._answered, self.last_progress_at = answered, now
+
+        if must_finalize():
+            return WORKER_DRAIN
+        limits = self.limits
+        if limits.max_call_duration and now - self.started_at >= limits.max_call_duration:
+            return MAX_DURATION
+        if limits.no_progress_timeout and now - self.last_progress_at >= limits.no_progress_timeout:
+            return NO_PROGRESS
+        speaking = self._agent_speaking or self._user_speaking
+        if limits.silence_timeout and not speaking and now - self.last_activity_at >= limits.silence_timeout:
+            return SILENCE
+        return None
+
+    async def _run(self) -> None:
+        while self.limit_hit is None:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            reason = self.check()
+            if reason is None:
+                continue
+            self.limit_hit = reason
+            metrics.inc("session_limit_hit", limit=reason)
+            logger.warning("Session limit hit: %s after %.0fs (%s answers)", reason,
+                           time.monotonic() - self.started_at, self._answered)
+            try:
+                await self.on_limit(reason)
+            except Exception as e:
+                logger.error("Failed to end session after %s: %s", reason, e)
+
+    async def aclose(self, *_) -> None:
+        if self._task is not None and self.limit_hit is None:
+            self._task.cancel()
@@ -27,7 +27,10 @@ CREATE TABLE IF NOT EXISTS "public"."answer" (
     "answer_text" "text" NOT NULL,
     "answered_at" timestamp with time zone DEFAULT "now"(),
     "created_at" timestamp with time zone DEFAULT "now"(),
-    "updated_at" timestamp with time zone DEFAULT "now"()
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    "answer_numeric" numeric,
+    "answer_boolean" boolean,
+    "answer_choice" "text"
 );
 
 ALTER TABLE "public"."answer" OWNER TO "postgres";
@@ -56,7 +59,10 @@ CREATE TABLE IF NOT EXISTS "public"."campaign" (
     "updated_at" timestamp with time zone DEFAULT "now"(),
     "campaign_type" "text" DEFAULT 'web_survey'::"text" NOT NULL,
     "campaign_uri" "text",
-    CONSTRAINT "campaign_campaign_type_check" CHECK (("campaign_type" = ANY (ARRAY['web_survey'::"text", 'phone_survey'::"text"])))
+    "silence_timeout_seconds" integer,
+    "no_progress_timeout_seconds" integer,
+    "max_call_duration_seconds" integer,
+    CONSTRAINT "campaign_campaign_type_check" CHECK (("campaign_type" = ANY (ARRAY['web_survey'::"text", 'phone_survey'::"text", 'text_survey'::"text"])))
 );
 
 ALTER TABLE "public"."campaign" OWNER TO "postgres";
@@ -98,7 +104,10 @@ CREATE TABLE IF NOT EXISTS "public"."question" (
     "question_text" "text" NOT NULL,
     "question_order" integer NOT NULL,
     "created_at" timestamp with time zone DEFAULT "now"(),
-    "updated_at" timestamp with time zone DEFAULT "now"()
+    "updated_at" timestamp with time zone DEFAULT "now"(),
+    "question_type" "text" DEFAULT 'free_text'::"text" NOT NULL,
+    "question_options" "jsonb",
+    CONSTRAINT "question_question_type_check" CHECK (("question_type" = ANY (ARRAY['free_text'::"text", 'scale'::"text", 'yes_no'::"text", 'multiple_choice'::"text", 'numeric'::"text"])))
 );
 
 ALTER TABLE "public"."question" OWNER TO "postgres";
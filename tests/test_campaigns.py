@@ -0,0 +1,65 @@
+import pytest
+
+from campaigns import build_bundle
+from question_types import NUMERIC, YES_NO, TypedAnswer
+
+CAMPAIGN = {"id": 1, "name": "Herd survey", "intro_prompt": "You are a surveyor.",
+            "purpose_explanation": "We study herds.", "greeting": "Hello"}
+ROWS = [
+    (10, "How many animals do you keep?", 1, NUMERIC, {"unit": "animals"}),
+    (11, "Do you grow feed?", 2, YES_NO, None),
+    (12, "Anything else?", 3),
+]
+
+
+@pytest.fixture
+def bundle():
+    return build_bundle(CAMPAIGN, ROWS)
+
+
+def test_bundle_questions_and_prompt(bundle):
+    assert [q.order for q in bundle.questions] == [1, 2, 3]
+    assert bundle.question_for(" 2 ").type == YES_NO
+    assert bundle.question_for("4") is None
+    assert "Expected answer: a number (animals)" in bundle.prompt
+    with pytest.raises(TypeError):
+        bundle.campaign["name"] = "changed"
+
+
+def test_answer_sheet_behaves_like_a_dict(bundle):
+    sheet = bundle.new_answer_sheet()
+    assert len(sheet) == 0 and "1" not in sheet
+    sheet["3"] = "No"
+    sheet["3"] = "Nothing"
+    sheet[1] = "12"
+    assert len(sheet) == 2
+    assert sheet["3"] == "Nothing"
+    assert sheet.to_dict() == {"1": "12", "3": "Nothing"}
+    with pytest.raises(KeyError):
+        sheet["2"]
+    with pytest.raises(KeyError):
+        sheet["9"] = "out of range"
+
+
+def test_answer_sheet_keeps_typed_values(bundle):
+    sheet = bundle.new_answer_sheet()
+    sheet["2"] = "plain text"
+    assert sheet.typed("2") is None
+    sheet["1"] = TypedAnswer(text="12", numeric=12.0)
+    assert sheet["1"] == "12"
+    assert sheet.typed("1").numeric == 12.0
+    sheet["1"] = "twelve"
+    assert sheet.typed("1") is None
+    assert sheet.typed("9") is None
+
+
+def test_answer_sheets_are_independent(bundle):
+    first, second = bundle.new_answer_sheet(), bundle.new_answer_sheet()
+    first["1"] = "5"
+    assert "1" not in second
+
+
+def test_questions_without_text_are_skipped():
+    bundle = build_bundle(CAMPAIGN, ROWS + [(13, None, 4), (14, "  ", 5)])
+    assert [q.order for q in bundle.questions] == [1, 2, 3]
+    assert bundle.question_for("4") is None
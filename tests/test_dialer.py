@@ -0,0 +1,187 @@
+import asyncio
+import json
+import sys
+import types
+from datetime import datetime
+from datetime import time as dt_time
+
+import pytest
+
+import dialer
+from dialer import (ANSWERED, BUSY, FAILED, NO_ANSWER, CallTarget, CsvCallList, DbCallList, Dialer, DialWindow,
+                    FakeSipApi, Pacer, PacingConfig, RetryPolicy, _parse_days, normalize_phone, parse_dial_metadata)
+
+# 2026-10-19 is a Monday
+MONDAY_NOON = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("(514) 555-0199", "+15145550199"),
+    ("+33 6 12 34 56 78", "+33612345678"),
+    ("33612345678", "+33612345678"),
+])
+def test_normalize_phone(raw, expected):
+    assert normalize_phone(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["", "12345", "not a number", "+1234567890123456"])
+def test_normalize_phone_rejects_invalid_numbers(raw):
+    with pytest.raises(ValueError):
+        normalize_phone(raw)
+
+
+def test_parse_dial_metadata():
+    metadata = json.dumps({"outbound": True, "campaign_id": 3, "call_list_entry_id": "abc"})
+    assert parse_dial_metadata(metadata)["campaign_id"] == 3
+    assert parse_dial_metadata(None) == {}
+    assert parse_dial_metadata("not json") == {}
+    assert parse_dial_metadata(json.dumps({"campaign_id": 3})) == {}
+
+
+def test_parse_days():
+    assert _parse_days("mon-fri") == frozenset(range(5))
+    assert _parse_days("sat, sun") == frozenset({5, 6})
+    assert _parse_days("mon,wed-thu") == frozenset({0, 2, 3})
+
+
+def test_dial_window_is_open():
+    window = DialWindow(start=dt_time(9, 0), end=dt_time(20, 0), days=frozenset(range(5)))
+    assert window.is_open(MONDAY_NOON)
+    assert not window.is_open(MONDAY_NOON.replace(hour=20))
+    assert not window.is_open(MONDAY_NOON.replace(hour=8, minute=59))
+    assert not window.is_open(datetime(2026, 10, 24, 12, 0))  # Saturday
+
+
+def test_dial_window_seconds_until_open():
+    window = DialWindow(start=dt_time(9, 0), end=dt_time(20, 0), days=frozenset(range(5)))
+    assert window.seconds_until_open(MONDAY_NOON) == 0.0
+    assert window.seconds_until_open(MONDAY_NOON.replace(hour=8)) == 3600
+    # Friday evening waits for Monday morning
+    assert window.seconds_until_open(datetime(2026, 10, 23, 21, 0)) == (2 * 24 + 12) * 3600
+    assert DialWindow(days=frozenset()).seconds_until_open(MONDAY_NOON) == float("inf")
+
+
+def test_retry_policy():
+    policy = RetryPolicy(max_attempts=3, retry_delay=60)
+    target = CallTarget(campaign_id=1, phone_number="+15145550199", attempts=1)
+    assert policy.status_after(target, ANSWERED) == "answered"
+    assert policy.status_after(target, FAILED) == "failed"
+    assert policy.status_after(target, NO_ANSWER) == "retry"
+    first_retry = target.next_attempt_at
+    target.attempts = 2
+    assert policy.status_after(target, BUSY) == "retry"
+    assert target.next_attempt_at - first_retry == pytest.approx(60, abs=1)
+    target.attempts = 3
+    assert policy.status_after(target, NO_ANSWER) == "failed"
+
+
+def pacer(**config) -> Pacer:
+    defaults = dict(max_concurrent_dials=10, total_capacity=8, max_dials_per_second=100, initial_answer_rate=0.5)
+    return Pacer(PacingConfig(**{**defaults, **config}))
+
+
+def test_pacer_fills_free_capacity_at_the_answer_rate():
+    # 8 free sessions at a 50% answer rate: 16 dials, capped by the dial concurrency
+    assert pacer().dials_allowed(ringing=0, active_sessions=0, tick_seconds=1) == 10
+    assert pacer(max_concurrent_dials=100).dials_allowed(ringing=0, active_sessions=0, tick_seconds=1) == 16
+    # 6 sessions and 2 ringing calls (expected to become 1 session) leave 1 free session
+    assert pacer().dials_allowed(ringing=2, active_sessions=6, tick_seconds=1) == 2
+
+
+def test_pacer_stops_when_capacity_is_used():
+    assert pacer().dials_allowed(ringing=0, active_sessions=8, tick_seconds=1) == 0
+    assert pacer().dials_allowed(ringing=4, active_sessions=6, tick_seconds=1) == 0
+
+
+def test_pacer_caps_the_dial_rate():
+    assert pacer(max_dials_per_second=2).dials_allowed(ringing=0, active_sessions=0, tick_seconds=1) == 2
+    assert pacer(max_dials_per_second=0.1).dials_allowed(ringing=0, active_sessions=0, tick_seconds=1) == 1
+
+
+def test_pacer_tracks_the_answer_rate():
+    p = pacer()
+    for _ in range(50):
+        p.record(NO_ANSWER)
+    assert p.answer_rate < 0.01
+    # Errors and invalid numbers say nothing about the answer rate
+    p.record(FAILED)
+    assert p.answer_rate < 0.01
+    # The rate is floored, so the pacer never dials an unbounded number of calls
+    assert p.dials_allowed(ringing=0, active_sessions=0, tick_seconds=1) == 10
+    for _ in range(50):
+        p.record(ANSWERED)
+    assert p.answer_rate > 0.99
+
+
+def test_dialer_works_through_a_csv_call_list(tmp_path):
+    path = tmp_path / "calls.csv"
+    path.write_text("phone_number,full_name\n" + "".join(f"514555{i:04d},Caller {i}\n" for i in range(20)) + "oops,Bad\n")
+    call_list = CsvCallList(str(path), campaign_id=3)
+    assert len(call_list.targets) == 20
+
+    sip_api = FakeSipApi(ring_seconds=(0.001, 0.005), talk_seconds=(0.01, 0.03), seed=1)
+    run = Dialer(call_list, sip_api, pacer=pacer(total_capacity=4, max_concurrent_dials=6),
+                 window=DialWindow(dt_time(0, 0), dt_time.max, frozenset(range(7))),
+                 retry=RetryPolicy(max_attempts=2, retry_delay=0.01), tick_seconds=0.005)
+    asyncio.run(asyncio.wait_for(run.run(), timeout=10))
+
+    assert all(t.status in ("answered", "failed") for t in call_list.targets)
+    assert not call_list.has_pending()
+    assert all(json.loads(m)["campaign_id"] == 3 for m in sip_api.rooms.values())
+    assert len(sip_api.dialed) >= 20
+
+
+def test_db_call_list_requeues_entries_stuck_in_dialing(monkeypatch):
+    calls = []
+    fake_db = types.SimpleNamespace(
+        reset_stale_call_list_entries=lambda campaign_id, before: calls.append((campaign_id, before)) or 2,
+        count_open_call_list_entries=lambda campaign_id: 0,
+        get_due_call_list_entries=lambda campaign_id, limit: [],
+        claim_call_list_entry=lambda entry_id, status, attempts: True,
+        update_call_list_entry=lambda entry_id, data: None,
+    )
+    monkeypatch.setitem(sys.modules, "db_manager", fake_db)
+    clock = [1_000_000.0]
+    monkeypatch.setattr(dialer.time, "time", lambda: clock[0])
+
+    call_list = DbCallList(campaign_id=3)
+    assert not call_list.has_pending()
+    assert call_list.due(5) == []
+    assert len(calls) == 1
+    assert calls[0][1].timestamp() == pytest.approx(clock[0] - dialer.DIALING_STALE_AFTER)
+    clock[0] += dialer.DIALING_STALE_AFTER
+    call_list.due(5)
+    assert len(calls) == 2
+
+
+def test_db_call_list_dials_only_claimed_entries(monkeypatch):
+    rows = [{"id": "a", "phone_number": "5145550101", "status": "pending", "attempts": 0},
+            {"id": "b", "phone_number": "5145550102", "status": "retry", "attempts": 1}]
+    claimed = []
+
+    def claim(entry_id, status, attempts):
+        claimed.append((entry_id, status, attempts))
+        # Another dialer claimed "b" between the read and the update
+        return entry_id != "b"
+
+    fake_db = types.SimpleNamespace(
+        reset_stale_call_list_entries=lambda campaign_id, before: 0,
+        get_due_call_list_entries=lambda campaign_id, limit: rows,
+        claim_call_list_entry=claim,
+        update_call_list_entry=lambda entry_id, data: None,
+    )
+    monkeypatch.setitem(sys.modules, "db_manager", fake_db)
+
+    targets = DbCallList(campaign_id=3).due(5)
+    assert [t.entry_id for t in targets] == ["a"]
+    assert claimed == [("a", "pending", 0), ("b", "retry", 1)]
+
+
+def test_pacing_config_requires_the_total_capacity(monkeypatch):
+    monkeypatch.delenv("DIALER_TOTAL_CAPACITY", raising=False)
+    monkeypatch.setenv("MAX_CONCURRENT_CALLS", "4")
+    with pytest.raises(ValueError):
+        PacingConfig.from_env()
+    assert PacingConfig.from_env(total_capacity=8).total_capacity == 8
+    monkeypatch.setenv("DIALER_TOTAL_CAPACITY", "24")
+    assert PacingConfig.from_env(total_capacity=8).total_capacity == 24
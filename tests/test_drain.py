@@ -0,0 +1,55 @@
+import json
+import time
+
+import pytest
+
+import drain
+
+
+@pytest.fixture(autouse=True)
+def stats_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKER_STATS_DIR", str(tmp_path))
+    monkeypatch.setattr(drain, "_marker", None)
+    monkeypatch.setattr(drain, "_marker_read_at", 0.0)
+    return tmp_path
+
+
+def write_marker(stats_dir, started_at, timeout):
+    (stats_dir / "drain.marker").write_text(json.dumps({"started_at": started_at, "deadline": started_at + timeout}))
+
+
+def test_not_draining_without_a_marker():
+    assert drain.drain_state() is None
+    assert not drain.must_finalize()
+    assert drain.time_left() is None
+
+
+def test_job_sees_the_drain_deadline(stats_dir):
+    write_marker(stats_dir, time.time(), timeout=600)
+    assert drain.time_left() == pytest.approx(600, abs=1)
+    assert not drain.must_finalize()
+
+
+def test_job_finalizes_close_to_the_deadline(stats_dir):
+    write_marker(stats_dir, time.time(), timeout=drain.DRAIN_FINALIZE_MARGIN - 1)
+    assert drain.must_finalize()
+
+
+def test_marker_from_an_earlier_run_is_ignored(stats_dir):
+    write_marker(stats_dir, drain.PROCESS_STARTED_AT - 3600, timeout=600)
+    assert drain.drain_state() is None
+    assert not drain.must_finalize()
+
+
+def test_worker_start_clears_the_previous_drain(stats_dir):
+    write_marker(stats_dir, time.time(), timeout=600)
+    (stats_dir / "drain-outcomes.log").write_text("cut\n")
+    drain.clear_drain_state()
+    assert not list(stats_dir.iterdir())
+
+
+def test_summary_counts_outcomes(stats_dir):
+    drain.start_drain(timeout=600)
+    for outcome in (drain.DRAINED, drain.DRAINED, drain.CUT):
+        drain.record_outcome(outcome)
+    assert drain.summarize() == {drain.DRAINED: 2, drain.CUT: 1}
@@ -0,0 +1,141 @@
+import pytest
+
+from question_types import (FREE_TEXT, MULTIPLE_CHOICE, NUMERIC, SCALE, YES_NO, InvalidAnswer,
+                            describe_expected, parse_number, validate_answer)
+
+ANIMALS = {"choices": ["Cattle", "Poultry", "Swine"]}
+HERD_SIZES = {"choices": ["1-10", "11-50", "51+"]}
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("42", 42.0),
+    ("3.5", 3.5),
+    ("1,200 head", 1200.0),
+    ("twenty five", 25.0),
+    ("two hundred and ten", 210.0),
+    ("three thousand", 3000.0),
+    ("none of your business", None),
+    ("twenty-five point five", None),
+    ("two and a half", None),
+    ("25 and a half", None),
+])
+def test_parse_number(raw, expected):
+    assert parse_number(raw) == expected
+
+
+def test_free_text_is_stripped_and_bounded():
+    assert validate_answer(FREE_TEXT, None, "  Wheat and barley ").text == "Wheat and barley"
+    with pytest.raises(InvalidAnswer):
+        validate_answer(FREE_TEXT, None, "   ")
+    with pytest.raises(InvalidAnswer, match="longer than 5"):
+        validate_answer(FREE_TEXT, {"max_length": 5}, "far too long")
+
+
+def test_unknown_type_falls_back_to_free_text():
+    assert validate_answer(None, None, "anything").text == "anything"
+    assert validate_answer("rating", None, "anything").text == "anything"
+
+
+def test_scale():
+    options = {"min": 1, "max": 5, "labels": {"1": "poor", "5": "excellent"}}
+    assert validate_answer(SCALE, options, "four").numeric == 4.0
+    assert validate_answer(SCALE, options, "Excellent").text == "5"
+    with pytest.raises(InvalidAnswer, match="from 1 to 5"):
+        validate_answer(SCALE, options, "7")
+    with pytest.raises(InvalidAnswer):
+        validate_answer(SCALE, options, "3.5")
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Yes", True),
+    ("yeah, definitely", True),
+    ("Nope.", False),
+    ("no", False),
+    ("Definitely not", False),
+    ("absolutely not!", False),
+    ("not really", False),
+    ("never", False),
+    ("that's not true", False),
+])
+def test_yes_no(raw, expected):
+    answer = validate_answer(YES_NO, None, raw)
+    assert answer.boolean is expected
+    assert answer.text == ("yes" if expected else "no")
+
+
+@pytest.mark.parametrize("raw", ["maybe", "I'm not sure", "yes and no", "no, well, yes", "yes, but I don't use it"])
+def test_yes_no_rejects_other_answers(raw):
+    with pytest.raises(InvalidAnswer, match="yes or no"):
+        validate_answer(YES_NO, None, raw)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("poultry", "Poultry"),
+    ("mostly cattle", "Cattle"),
+    ("2", "Poultry"),
+    ("option 3", "Swine"),
+    ("number two", "Poultry"),
+    ("the second one", "Poultry"),
+    ("the third option", "Swine"),
+    ("1st", "Cattle"),
+    ("one", "Cattle"),
+])
+def test_multiple_choice(raw, expected):
+    assert validate_answer(MULTIPLE_CHOICE, ANIMALS, raw).choice == expected
+
+
+@pytest.mark.parametrize("raw", ["a", "ca", "goats", "7", "we have two barns", "the fifth one"])
+def test_multiple_choice_rejects_non_matches(raw):
+    with pytest.raises(InvalidAnswer, match="not one of the choices"):
+        validate_answer(MULTIPLE_CHOICE, ANIMALS, raw)
+
+
+def test_multiple_choice_asks_when_several_match():
+    with pytest.raises(InvalidAnswer, match="several choices"):
+        validate_answer(MULTIPLE_CHOICE, ANIMALS, "cattle and swine")
+    with pytest.raises(InvalidAnswer, match="several choices"):
+        validate_answer(MULTIPLE_CHOICE, {"choices": ["Dairy cattle", "Beef cattle"]}, "cattle")
+
+
+def test_multiple_choice_matches_a_word_of_a_choice():
+    assert validate_answer(MULTIPLE_CHOICE, {"choices": ["Dairy cattle", "Beef cattle"]}, "dairy").choice == "Dairy cattle"
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("5", "1-10"),
+    ("10", "1-10"),
+    ("about thirty", "11-50"),
+    ("51", "51+"),
+    ("11-50", "11-50"),
+    ("the second one", "11-50"),
+])
+def test_multiple_choice_range_buckets(raw, expected):
+    assert validate_answer(MULTIPLE_CHOICE, HERD_SIZES, raw).choice == expected
+
+
+def test_multiple_choice_range_bucket_bounds():
+    options = {"choices": ["Under 5", "5 to 9", "10 or more"]}
+    assert validate_answer(MULTIPLE_CHOICE, options, "4").choice == "Under 5"
+    assert validate_answer(MULTIPLE_CHOICE, options, "5").choice == "5 to 9"
+    assert validate_answer(MULTIPLE_CHOICE, options, "120").choice == "10 or more"
+    with pytest.raises(InvalidAnswer, match="none of the ranges"):
+        validate_answer(MULTIPLE_CHOICE, HERD_SIZES, "0")
+
+
+def test_numeric():
+    options = {"min": 0, "max": 10000, "integer": True, "unit": "animals"}
+    answer = validate_answer(NUMERIC, options, "about 1,200")
+    assert (answer.text, answer.numeric) == ("1200", 1200.0)
+    with pytest.raises(InvalidAnswer, match="whole number"):
+        validate_answer(NUMERIC, options, "2.5")
+    with pytest.raises(InvalidAnswer, match="between 0 and 10000"):
+        validate_answer(NUMERIC, options, "20000")
+    with pytest.raises(InvalidAnswer, match=r"a number \(animals\)"):
+        validate_answer(NUMERIC, options, "lots")
+
+
+def test_describe_expected():
+    assert describe_expected(FREE_TEXT, None) is None
+    assert describe_expected(SCALE, {"min": 0, "max": 10}) == "a whole number from 0 to 10"
+    assert describe_expected(MULTIPLE_CHOICE, ANIMALS) == "one of: Cattle; Poultry; Swine"
+    assert describe_expected(NUMERIC, {"unit": "hectares"}) == "a number (hectares)"
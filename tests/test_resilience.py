@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+import metrics
+import resilience
+from resilience import (CLOSED, HALF_OPEN, OPEN, STATE_GAUGE, CircuitBreaker, DeadlineBudget, DependencyUnavailable,
+                        guarded_call)
+
+
+@pytest.fixture(autouse=True)
+def stats_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORKER_STATS_DIR", str(tmp_path))
+    monkeypatch.setattr(resilience, "_breakers", {})
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(resilience.time, "time", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("db", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_allows_a_single_trial(clock):
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 31
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens_the_breaker(clock):
+    breaker = CircuitBreaker("db", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 31
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_shared_breaker_state_is_seen_by_other_processes(stats_dir, clock):
+    CircuitBreaker("supabase", failure_threshold=1).record_failure()
+    assert (stats_dir / "breaker-supabase.json").exists()
+    # A breaker in another job process reads the same file
+    assert CircuitBreaker("supabase", failure_threshold=1).state == OPEN
+
+
+def test_local_breaker_keeps_its_state_in_memory(stats_dir, clock):
+    breaker = CircuitBreaker("data_channel", failure_threshold=1, shared=False)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not list(stats_dir.iterdir())
+    assert CircuitBreaker("data_channel", failure_threshold=1, shared=False).state == CLOSED
+
+
+def test_deadline_budget():
+    budget = DeadlineBudget(total_seconds=5)
+    assert 4 < budget.remaining() <= 5
+    assert budget.timeout(cap=1) == 1
+    assert DeadlineBudget(total_seconds=0).timeout(cap=1) == 0
+
+
+def test_guarded_call_returns_the_result_or_the_fallback():
+    async def ok(value):
+        return value
+
+    async def broken():
+        raise RuntimeError("down")
+
+    def blocking(value):
+        return value * 2
+
+    async def scenario():
+        assert await guarded_call("svc", ok, 1) == 1
+        assert await guarded_call("svc", blocking, 2) == 4
+        assert await guarded_call("svc", broken, fallback="cached") == "cached"
+        assert await guarded_call("svc", broken, fallback=lambda: "computed") == "computed"
+        with pytest.raises(DependencyUnavailable):
+            await guarded_call("svc", broken)
+
+    asyncio.run(scenario())
+
+
+def test_guarded_call_times_out_and_opens_the_breaker():
+    async def slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        breaker = CircuitBreaker("slow", failure_threshold=2, shared=False)
+        for _ in range(2):
+            assert await guarded_call("slow", slow, timeout=0.01, fallback=None, breaker=breaker) is None
+        assert breaker.state == OPEN
+        with pytest.raises(DependencyUnavailable, match="circuit_open"):
+            await guarded_call("slow", slow, timeout=0.01, breaker=breaker)
+
+    asyncio.run(scenario())
+
+
+def test_guarded_call_with_a_spent_budget_gives_back_the_trial(clock):
+    async def never_called():
+        raise AssertionError
+
+    async def scenario():
+        breaker = CircuitBreaker("db", failure_threshold=1, shared=False)
+        breaker.record_failure()
+        clock[0] += 60
+        spent = DeadlineBudget(total_seconds=0)
+        with pytest.raises(DependencyUnavailable, match="deadline_exceeded"):
+            await guarded_call("db", never_called, budget=spent, breaker=breaker)
+        assert breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def test_state_changes_are_published_as_they_happen(clock):
+    breaker = CircuitBreaker("egress", failure_threshold=1, reset_timeout=30)
+    gauge = lambda: metrics.snapshot()["circuit_breaker_state{dependency=egress}"]
+    breaker.record_failure()
+    assert gauge() == STATE_GAUGE[OPEN]
+    clock[0] += 31
+    assert breaker.state == HALF_OPEN
+    assert gauge() == STATE_GAUGE[HALF_OPEN]
+    breaker.record_success()
+    assert gauge() == STATE_GAUGE[CLOSED]
+
+
+def test_report_reads_breakers_opened_by_other_processes(clock, monkeypatch):
+    other_process = CircuitBreaker("supabase")
+    for _ in range(resilience.BREAKER_FAILURE_THRESHOLD):
+        other_process.record_failure()
+    monkeypatch.setattr(metrics, "_gauges", {})
+    metrics.report()
+    assert metrics.snapshot()["circuit_breaker_state{dependency=supabase}"] == STATE_GAUGE[OPEN]
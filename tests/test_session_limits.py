@@ -0,0 +1,60 @@
+import types
+
+import pytest
+
+import session_limits
+from session_limits import MAX_DURATION, NO_PROGRESS, SILENCE, SessionLimits, SessionWatchdog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_limits.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(session_limits, "must_finalize", lambda: False)
+    return now
+
+
+def watchdog(**limits) -> SessionWatchdog:
+    defaults = dict(silence_timeout=60, no_progress_timeout=300, max_call_duration=1800)
+    userdata = types.SimpleNamespace(questionnaire_answers={})
+    return SessionWatchdog(userdata, SessionLimits(**{**defaults, **limits}), on_limit=None)
+
+
+def state(new_state: str):
+    return types.SimpleNamespace(new_state=new_state)
+
+
+def test_silence_is_counted_from_the_last_turn(clock):
+    dog = watchdog()
+    dog._on_agent_state_changed(state("speaking"))
+    clock[0] += 120
+    assert dog.check() is None
+    dog._on_agent_state_changed(state("listening"))
+    clock[0] += 59
+    assert dog.check() is None
+    clock[0] += 1
+    assert dog.check() == SILENCE
+
+
+def test_a_long_user_turn_is_not_silence(clock):
+    dog = watchdog()
+    dog._on_user_state_changed(state("speaking"))
+    clock[0] += 90
+    assert dog.check() is None
+    dog._on_user_state_changed(state("listening"))
+    clock[0] += 59
+    assert dog.check() is None
+    clock[0] += 1
+    assert dog.check() == SILENCE
+
+
+def test_no_progress_and_max_duration(clock):
+    dog = watchdog(silence_timeout=0, max_call_duration=400)
+    clock[0] += 200
+    dog.userdata.questionnaire_answers = {1: "yes"}
+    assert dog.check() is None
+    clock[0] += 200
+    assert dog.check() == MAX_DURATION
+    dog = watchdog(silence_timeout=0)
+    clock[0] += 300
+    assert dog.check() == NO_PROGRESS
@@ -0,0 +1,110 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from admission import register_queue_depth, unregister_queue_depth
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.transcripts")
+
+# A batch is written when this many turns are pending or after this many seconds
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", "20"))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "15"))
+
+# Pending turns kept when the DB is unavailable; the oldest are dropped beyond this
+TRANSCRIPT_MAX_PENDING = 1000
+
+SPEAKER_BY_ROLE = {"user": "participant", "assistant": "agent"}
+
+
+class TranscriptBuffer:
+    """Collects the turns of one session and writes them to the transcript_turn table
+    in batches from a background task, so no DB call happens on the conversation path."""
+
+    def __init__(self, submission_id, writer: Optional[Callable[[list[dict]], Any]] = None,
+                 batch_size: int = TRANSCRIPT_BATCH_SIZE, flush_interval: float = TRANSCRIPT_FLUSH_INTERVAL):
+        if writer is None:
+            from db_manager import record_transcript_turns
+            writer = record_transcript_turns
+        self.submission_id = submission_id
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: list[dict] = []
+        self._next_index = 0
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def attach(self, session) -> None:
+        """Capture user and agent turns from an AgentSession and start the flush loop."""
+        session.on("conversation_item_added", self._on_conversation_item_added)
+        register_queue_depth("transcript", self.__len__)
+        self._task = asyncio.create_task(self._run())
+
+    def _on_conversation_item_added(self, event) -> None:
+        item = event.item
+        speaker = SPEAKER_BY_ROLE.get(getattr(item, "role", None))
+        text = getattr(item, "text_content", None)
+        if speaker and text:
+            self.add(speaker, text)
+
+    def add(self, speaker: str, text: str, spoken_at: Optional[datetime] = None) -> None:
+        if self._closed:
+            return
+        self._pending.append({
+            "turn_index": self._next_index,
+            "speaker": speaker,
+            "text": text,
+            "spoken_at": (spoken_at or datetime.now(timezone.utc)).isoformat(),
+        })
+        self._next_index += 1
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closed:
+                return
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write all pending turns. Returns False if the write failed (turns are kept for retry).
+
+        Turns are held back while the submission id is unknown (submission not created yet).
+        """
+        async with self._flush_lock:
+            if not self._pending or self.submission_id is None:
+                return not self._pending
+            batch, self._pending = self._pending, []
+            rows = [{"survey_submission_id": self.submission_id, **turn} for turn in batch]
+            try:
+                await asyncio.to_thread(self.writer, rows)
+                logger.debug("Flushed %s transcript turns", len(batch))
+                return True
+            except Exception as e:
+                logger.error("Failed to write %s transcript turns: %s", len(batch), e)
+                self._pending = (batch + self._pending)[-TRANSCRIPT_MAX_PENDING:]
+                return False
+
+    async def aclose(self, *_) -> None:
+        """Stop the flush loop and write whatever is still pending (once)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            # Let an in-flight batch finish rather than cancelling it mid-write
+            await self._task
+        await self.flush()
+        unregister_queue_depth("transcript")
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from typing import Optional
+
+from logging_config import LOGGER_NAME, get_logger
+
+logger = get_logger(f"{LOGGER_NAME}.usage")
+
+# Unit prices (USD) used for the cost estimate; defaults are list prices of the models in use
+PRICES = {
+    "llm_prompt_per_1m": float(os.getenv("PRICE_LLM_PROMPT_PER_1M", "0.15")),
+    "llm_cached_per_1m": float(os.getenv("PRICE_LLM_CACHED_PER_1M", "0.075")),
+    "llm_completion_per_1m": float(os.getenv("PRICE_LLM_COMPLETION_PER_1M", "0.60")),
+    "stt_per_minute": float(os.getenv("PRICE_STT_PER_MINUTE", "0.0043")),
+    "tts_per_1m_chars": float(os.getenv("PRICE_TTS_PER_1M_CHARS", "15.0")),
+    "egress_per_minute": float(os.getenv("PRICE_EGRESS_PER_MINUTE", "0.005")),
+}
+
+
+class SessionUsage:
+    """Accumulates the LLM, STT, TTS, tool and egress usage of one session from the
+    AgentSession metrics events, and writes it with a cost estimate to survey_submissions."""
+
+    def __init__(self, userdata):
+        self.userdata = userdata
+        self.llm_requests = 0
+        self.llm_prompt_tokens = 0
+        self.llm_cached_tokens = 0
+        self.llm_completion_tokens = 0
+        self.stt_audio_seconds = 0.0
+        self.tts_characters = 0
+        self.tool_calls = 0
+        # Set when the recording is finalized (see RecordingManager)
+        self.egress_seconds: Optional[float] = None
+        self._save_lock = asyncio.Lock()
+
+    def attach(self, session) -> None:
+        session.on("metrics_collected", self._on_metrics_collected)
+        session.on("function_tools_executed", self._on_function_tools_executed)
+
+    def _on_metrics_collected(self, event) -> None:
+        # Dispatch on the metrics class name so livekit.agents.metrics is not imported here
+        m = event.metrics
+        kind = type(m).__name__
+        if kind == "LLMMetrics":
+            self.llm_requests += 1
+            self.llm_prompt_tokens += getattr(m, "prompt_tokens", 0) or 0
+            self.llm_cached_tokens += getattr(m, "prompt_cached_tokens", 0) or 0
+            self.llm_completion_tokens += getattr(m, "completion_tokens", 0) or 0
+        elif kind == "STTMetrics":
+            self.stt_audio_seconds += getattr(m, "audio_duration", 0.0) or 0.0
+        elif kind == "TTSMetrics":
+            self.tts_characters += getattr(m, "characters_count", 0) or 0
+
+    def _on_function_tools_executed(self, event) -> None:
+        self.tool_calls += len(getattr(event, "function_calls", ()) or ())
+
+    def estimated_cost(self) -> float:
+        uncached_prompt = max(0, self.llm_prompt_tokens - self.llm_cached_tokens)
+        cost = (
+            uncached_prompt * PRICES["llm_prompt_per_1m"] / 1e6
+            + self.llm_cached_tokens * PRICES["llm_cached_per_1m"] / 1e6
+            + self.llm_completion_tokens * PRICES["llm_completion_per_1m"] / 1e6
+            + self.stt_audio_seconds / 60 * PRICES["stt_per_minute"]
+            + self.tts_characters * PRICES["tts_per_1m_chars"] / 1e6
+            + (self.egress_seconds or 0.0) / 60 * PRICES["egress_per_minute"]
+        )
+        return round(cost, 6)
+
+    def to_dict(self) -> dict:
+        return {
+            "llm_requests": self.llm_requests,
+            "llm_prompt_tokens": self.llm_prompt_tokens,
+            "llm_cached_tokens": self.llm_cached_tokens,
+            "llm_completion_tokens": self.llm_completion_tokens,
+            "stt_audio_seconds": round(self.stt_audio_seconds, 3),
+            "tts_characters": self.tts_characters,
+            "tool_calls": self.tool_calls,
+            "estimated_cost_usd": self.estimated_cost(),
+        }
+
+    async def save(self, *_) -> bool:
+        """Write the usage to the session's submission. Called on shutdown and again when the
+        recording is finalized, so whichever runs last stores the complete numbers."""
+        from db_manager import update_survey_submission_usage
+
+        submission_id = self.userdata.submission_id
+        usage = self.to_dict()
+        if submission_id is None:
+            logger.warning("No submission to attach usage to: %s", usage)
+            return False
+        async with self._save_lock:
+            try:
+                await asyncio.to_thread(update_survey_submission_usage, submission_id, usage)
+            except Exception as e:
+                logger.error("Failed to save session usage: %s", e)
+                return False
+        logger.info("Session usage: %s", usage, extra={"category": "metrics"})
+        return True
@@ -1,28 +1,70 @@
-import yaml
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Mapping, Optional
+
+if TYPE_CHECKING:
+    from livekit import rtc
+    from livekit.agents import Agent, AgentSession
 
-from livekit.agents import (Agent, AgentSession)
+    from campaigns import AnswerSheet, CampaignBundle, Question
+    from recording import RecordingManager
+    from resilience import CircuitBreaker
+    from session_limits import SessionWatchdog
+    from transcripts import TranscriptBuffer
+    from usage import SessionUsage
 
-@dataclass
+@dataclass(slots=True)
 class UserData:
     customer_first_name: Optional[str] = None
     customer_last_name: Optional[str] = None
     customer_phone: Optional[str] = None
-    questionnaire_answers: dict[str, str] = field(default_factory=dict)
+    customer_email: Optional[str] = None
+    questionnaire_answers: Optional[AnswerSheet] = None
     recording_id: Optional[str] = None 
+    s3_recording_url: Optional[str] = None
+    submission_id: Optional[Any] = None
+
+    # Shared, read-only campaign data (same object for every session of a campaign)
+    bundle: Optional[CampaignBundle] = None
     
     agents: dict[str, Agent] = field(default_factory=dict)
     prev_agent: Optional[Agent] = None
     session: Optional[AgentSession] = None
+    room: Optional[rtc.Room] = None
+    transcript: Optional[TranscriptBuffer] = None
+    recording: Optional[RecordingManager] = None
+    usage: Optional[SessionUsage] = None
+    watchdog: Optional[SessionWatchdog] = None
+    # Per-session breaker: a broken data channel only concerns this room
+    data_channel_breaker: Optional[CircuitBreaker] = None
+
+    def attach_bundle(self, bundle: CampaignBundle) -> None:
+        self.bundle = bundle
+        self.questionnaire_answers = bundle.new_answer_sheet()
+
+    @property
+    def campaign(self) -> Mapping:
+        return self.bundle.campaign
+
+    @property
+    def questions(self) -> tuple[Question, ...]:
+        return self.bundle.questions if self.bundle else ()
+
+    @property
+    def call_id(self):
+        # Legacy name for submission_id
+        return self.submission_id
     
 
     def summarize(self) -> str:
+        import yaml
+
         data = {
             "customer_first_name": self.customer_first_name or "unknown",
             "customer_last_name": self.customer_last_name or "unknown",
             "customer_phone": self.customer_phone or "unknown",
-            "questionnaire_answers": self.questionnaire_answers or "unknown",
+            "questionnaire_answers": self.questionnaire_answers.to_dict() if self.questionnaire_answers else "unknown",
             "recording_id": self.recording_id or "unknown",
         }
         return yaml.dump(data)
\ No newline at end of file